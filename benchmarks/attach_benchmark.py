@@ -0,0 +1,78 @@
+"""
+Benchmark of the latency of dropping a tile in the planet view's edit mode.
+Generates boards of instanced tiles of increasing size, places them like the generated layout and attaches them.
+Then repeatedly grabs a tile, drops it slightly off its place and measures how long joint_attacher.try_attach()
+takes to snap and attach it again.
+
+Usage: python -m benchmarks.attach_benchmark [--sizes 50 200 800] [--designs 20] [--drops 200]
+"""
+
+import argparse
+import math
+import random
+import tempfile
+import time
+import pygame
+from pygame import Vector2
+from benchmarks.frame_benchmark import place_tiles
+from mothership.gui.planet_view import joint_attacher
+from mothership.gui.planet_view.tile_occupancy import TileOccupancy
+from mothership.io.load_tiles import TileLoader
+from planets.code.generation.board_generator import GeneratorSettings, generate_board
+
+
+def benchmark_board(tile_count: int, designs: int, drops: int):
+    cols = math.ceil(math.sqrt(tile_count))
+    rows = math.ceil(tile_count / cols)
+
+    with tempfile.TemporaryDirectory() as board_dir:
+        settings = GeneratorSettings(rows=rows, cols=cols, seed=0, designs=designs, rotate_tiles=True)
+        generate_board(settings, board_dir)
+        loader = TileLoader(board_dir, 0.05)
+        loader.load()
+        tiles = loader.svg_tiles
+        place_tiles(board_dir, tiles)
+
+        occupancy = TileOccupancy(tiles)
+        for tile in tiles:
+            joint_attacher.try_attach(tile, tiles, occupancy)
+        assert joint_attacher.all_tiles_form_one_planet(tiles)
+
+        rng = random.Random(0)
+        total_seconds = 0.0
+        for _ in range(drops):
+            tile = rng.choice(tiles)
+            home = Vector2(tile.pos)
+
+            # GRAB AND DROP SLIGHTLY OFF
+            joint_attacher.detach_from_others(tile, tiles)
+            tile.detach_joints()
+            tile.snapped_in_place = False
+            tile.pos += Vector2(rng.uniform(-0.05, 0.05), rng.uniform(-0.05, 0.05))
+
+            start = time.perf_counter()
+            joint_attacher.try_attach(tile, tiles, occupancy)
+            total_seconds += time.perf_counter() - start
+
+            assert tile.pos == home, "dropped tile did not snap back into place"
+
+        assert joint_attacher.all_tiles_form_one_planet(tiles)
+        print(f"{len(tiles):>5} tiles: {total_seconds * 1000 / drops:.3f} ms per drop")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 800])
+    parser.add_argument("--designs", type=int, default=20)
+    parser.add_argument("--drops", type=int, default=200)
+    args = parser.parse_args()
+
+    pygame.init()
+    pygame.display.set_mode((100, 100))
+
+    for tile_count in args.sizes:
+        benchmark_board(tile_count, args.designs, args.drops)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark of the planet view's per-frame tile drawing.
+Generates a board of instanced tiles, places them like the generated layout and draws all of them repeatedly,
+once like the original DraggableTile.draw() (copying and setting the alpha of every tile surface each frame)
+and once with the cached display surfaces.
+
+Usage: python -m benchmarks.frame_benchmark [--tiles 200] [--designs 20] [--frames 120] [--scale 0.1]
+"""
+
+import argparse
+import json
+import math
+import os
+import tempfile
+import time
+import pygame
+from pygame import Vector2
+from mothership.gui.planet_view.camera import Camera
+from mothership.gui.planet_view.tile import DraggableTile
+from mothership.io.load_tiles import TileLoader
+from planets.code.generation.board_generator import GeneratorSettings, generate_board
+
+
+def draw_copying(tile: DraggableTile, screen: pygame.Surface, camera: Camera, is_planet_mode: bool):
+    max_alpha = 255 if is_planet_mode else 180
+
+    rect = tile.screen_rect(camera)
+    image = tile.images.get(tile.blank_mode, rect.width, tile.rotation_deg).copy()
+    image.set_alpha(max_alpha if tile.snapped_in_place else 90)
+    screen.blit(image, rect)
+
+
+def draw_cached(tile: DraggableTile, screen: pygame.Surface, camera: Camera, is_planet_mode: bool):
+    tile.draw(screen, camera, is_planet_mode)
+
+
+def place_tiles(board_dir: str, tiles: list[DraggableTile]):
+    with open(os.path.join(board_dir, "layout.json"), "r") as f:
+        layout = json.load(f)
+
+    tile_dict = {tile.tile_id: tile for tile in tiles}
+    for entry in layout["tiles"]:
+        tile = tile_dict[entry["tile_id"]]
+        tile.snap_to_pos(entry["cell"][0], entry["cell"][1])
+        for _ in range(entry["rotation"] // 90):
+            tile.rotate_right()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tiles", type=int, default=200)
+    parser.add_argument("--designs", type=int, default=20)
+    parser.add_argument("--frames", type=int, default=120)
+    parser.add_argument("--scale", type=float, default=0.1)
+    args = parser.parse_args()
+
+    cols = math.ceil(math.sqrt(args.tiles))
+    rows = math.ceil(args.tiles / cols)
+
+    pygame.init()
+    screen = pygame.display.set_mode((1280, 720))
+
+    with tempfile.TemporaryDirectory() as board_dir:
+        settings = GeneratorSettings(rows=rows, cols=cols, seed=0, designs=args.designs, rotate_tiles=True)
+        generate_board(settings, board_dir)
+        loader = TileLoader(board_dir, args.scale)
+        loader.load()
+        tiles = loader.svg_tiles
+        place_tiles(board_dir, tiles)
+        camera = Camera(tiles[0].images.size, Vector2(0, 0))
+        print(f"{len(tiles)} tiles of {len(loader.tile_data)} designs at {camera.tile_size}x{camera.tile_size} px")
+
+        for name, draw in [("copying", draw_copying), ("cached", draw_cached)]:
+            for tile in tiles:
+                draw(tile, screen, camera, False)  # Warm up
+
+            start = time.perf_counter()
+            for frame in range(args.frames):
+                screen.fill((255, 255, 255))
+                for tile in tiles:
+                    draw(tile, screen, camera, False)
+                pygame.display.flip()
+            frame_ms = (time.perf_counter() - start) * 1000 / args.frames
+            print(f"{name:>8}: {frame_ms:.2f} ms per frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark of the svg rasterization that dominates mothership startup.
+Generates a synthetic board and rasterizes the detailed and blank svg of every tile, once one after another
+(like the original DraggableTile constructor), once in parallel worker processes and once more from the warm
+on-disk raster cache. Finally times the complete TileLoader.load() on repeated launches, once from the planet
+directory and once from a memory-mapped tile pack (including the check that the pack is up to date).
+
+Usage: python -m benchmarks.startup_benchmark [--rows 10] [--cols 12] [--scale 0.4]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+import cairosvg
+import pygame
+from mothership.io import svg_rasterizer
+from mothership.io.raster_cache import RasterCache
+from mothership.io.load_tiles import TileLoader
+from mothership.io.tile_pack import PACK_FILE_NAME, build_pack
+from planets.code.generation.board_generator import GeneratorSettings, generate_board
+
+
+def rasterize_sequential(svg_files: list[str], size: int) -> list[pygame.Surface]:
+    surfaces = list()
+    for file in svg_files:
+        png_data = cairosvg.svg2png(url=file, output_width=size, output_height=size)
+        surfaces.append(pygame.image.load(io.BytesIO(png_data)))
+    return surfaces
+
+
+def rasterize_parallel(svg_files: list[str], size: int) -> list[pygame.Surface]:
+    jobs = list()
+    for file in svg_files:
+        with open(file, "rb") as f:
+            jobs.append((f.read(), size, size))
+    return [svg_rasterizer.surface_from_rgba(rgba, size, size) for rgba in svg_rasterizer.rasterize_all(jobs)]
+
+
+def load_cached(svg_files: list[str], size: int, cache: RasterCache) -> list[pygame.Surface]:
+    surfaces = list()
+    for file in svg_files:
+        with open(file, "rb") as f:
+            svg_data = f.read()
+        rgba = cache.get(svg_data, size, size)
+        if rgba is None:
+            rgba = svg_rasterizer.rasterize_svg(svg_data, size, size)
+            cache.put(svg_data, size, size, rgba)
+        surfaces.append(svg_rasterizer.surface_from_rgba(rgba, size, size))
+    return surfaces
+
+
+def load_tiles(board_dir: str, scale: float) -> float:
+    """
+    :return: Seconds the TileLoader took to load the given planet directory, without its progress output
+    """
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        TileLoader(board_dir, scale).load()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10)
+    parser.add_argument("--cols", type=int, default=12)
+    parser.add_argument("--scale", type=float, default=0.4)
+    args = parser.parse_args()
+
+    size = int(svg_rasterizer.TILE_SVG_SIZE * args.scale)
+    with tempfile.TemporaryDirectory() as board_dir:
+        tile_ids = generate_board(GeneratorSettings(rows=args.rows, cols=args.cols, seed=0), board_dir)
+        svg_dir = os.path.join(board_dir, "svg")
+        svg_files = [os.path.join(svg_dir, f"{tile_id}{suffix}.svg")
+                     for tile_id in tile_ids for suffix in ["", "_blank"]]
+        print(f"{len(tile_ids)} tiles, {len(svg_files)} svgs at {size}x{size} px")
+
+        for name, rasterize in [("sequential", rasterize_sequential), ("parallel", rasterize_parallel)]:
+            start = time.perf_counter()
+            rasterize(svg_files, size)
+            print(f"{name:>10}: {time.perf_counter() - start:.3f} s")
+
+        cache = RasterCache(os.path.join(board_dir, "rasters"))
+        load_cached(svg_files, size, cache)  # Warm up
+        start = time.perf_counter()
+        load_cached(svg_files, size, cache)
+        print(f"{'cached':>10}: {time.perf_counter() - start:.3f} s")
+
+        load_tiles(board_dir, args.scale)  # Warm up the raster and tile data caches
+        print(f"{'directory':>10}: {load_tiles(board_dir, args.scale):.3f} s")
+
+        build_pack(board_dir, os.path.join(board_dir, PACK_FILE_NAME), args.scale)
+        load_tiles(board_dir, args.scale)
+        print(f"{'pack':>10}: {load_tiles(board_dir, args.scale):.3f} s")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,5 @@
 from typing import Optional
 import pygame
-from mothership.gui.tank_internal_map.tank_map_renderer import TankMapRenderer
 from mothership.gui.tank_internal_map.tank_map_subgui import TankMapSubGUI
 from mothership.update_event import UpdateEvent, TankPlanetUpdate
 from mothership.gui.planet_view.planet_view import PlanetView
@@ -102,21 +101,18 @@ class GUICore:
 
     def display_tank_internal_planet(self, event: TankPlanetUpdate):
         """
-        Helper function for updating the TankMapSubGUI and rendering a new image based on the given TankPlanetUpdate
+        Helper function for updating the TankMapSubGUI based on the given TankPlanetUpdate
         without needing access to the TankMapSubGUI class.
         """
 
-        self.sub_GUIs.get("tank_map").update_image(
-            TankMapRenderer.render_map_image(event.planet, event.cur_node, event.target_node,
-                                             event.target_route, event.depart_dir)
-        )
+        self.sub_GUIs.get("tank_map").display_map(event)
 
     def remove_tank(self):
         """
         Removes the currently connected tank client from all SubGUIs.
         """
 
-        self.sub_GUIs.get("tank_map").remove_image()
+        self.sub_GUIs.get("tank_map").remove_map()  # The next tank starts with a fresh map
         self.sub_GUIs.get("coms").tank_header_state = ComsSubGUI.TankHeaderState.ADDING_TANK
 
         self.planet_view.reset_planet() # Rebuild planet to remove any changes made by tank coms
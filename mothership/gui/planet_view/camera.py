@@ -0,0 +1,65 @@
+import pygame
+from pygame.math import Vector2
+
+
+class Camera:
+    """
+    View transform of the planet view. Tiles are placed in world coordinates, measured in tiles with x pointing east
+    and y pointing south (like the screen). The camera maps them to screen pixels, so panning and zooming only ever
+    change the camera and never the tiles.
+    """
+
+    # Factors of the size the tiles were loaded with
+    ZOOM_FACTORS = [0.25, 0.35, 0.5, 0.7, 1.0, 1.4, 2.0, 2.8]
+
+    base_tile_size: int  # On-screen size of a tile in pixels at zoom factor 1
+    zoom_index: int
+    tile_size: int  # Current on-screen size of a tile in pixels
+    offset: Vector2  # Screen position of the world origin
+
+    def __init__(self, base_tile_size: int, offset: Vector2):
+        self.base_tile_size = base_tile_size
+        self.zoom_index = self.ZOOM_FACTORS.index(1.0)
+        self.tile_size = base_tile_size
+        self.offset = Vector2(offset)
+
+    def world_to_screen(self, pos: Vector2) -> tuple[int, int]:
+        # The tile size is an integer, so tiles that are exactly one tile apart in the world are drawn
+        # exactly one tile size apart on screen
+        return round(self.offset.x + pos.x * self.tile_size), round(self.offset.y + pos.y * self.tile_size)
+
+    def screen_to_world(self, screen_x: float, screen_y: float) -> Vector2:
+        return Vector2((screen_x - self.offset.x) / self.tile_size, (screen_y - self.offset.y) / self.tile_size)
+
+    def screen_rect(self, pos: Vector2) -> pygame.Rect:
+        """
+        Returns the screen area of the tile with the given world position (top left corner).
+        """
+
+        return pygame.Rect(self.world_to_screen(pos), (self.tile_size, self.tile_size))
+
+    def pan(self, dx: float, dy: float):
+        """
+        Moves the view by the given amount of screen pixels.
+        """
+
+        self.offset.x += dx
+        self.offset.y += dy
+
+    def zoom(self, steps: int, anchor_x: float, anchor_y: float) -> bool:
+        """
+        Zooms in (positive steps) or out (negative steps) by the given number of zoom levels while keeping
+        the world position under the given screen position in place.
+
+        :return: Whether the zoom level changed
+        """
+
+        new_index = max(0, min(len(self.ZOOM_FACTORS) - 1, self.zoom_index + steps))
+        if new_index == self.zoom_index:
+            return False
+
+        anchor = self.screen_to_world(anchor_x, anchor_y)
+        self.zoom_index = new_index
+        self.tile_size = round(self.base_tile_size * self.ZOOM_FACTORS[self.zoom_index])
+        self.offset = Vector2(anchor_x - anchor.x * self.tile_size, anchor_y - anchor.y * self.tile_size)
+        return True
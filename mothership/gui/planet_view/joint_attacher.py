@@ -1,35 +1,79 @@
-from collections import deque
-
+from typing import Optional
 from pygame import Vector2
 from mothership.gui.planet_view.tile import DraggableTile
-from util.direction import Direction
+from mothership.gui.planet_view.tile_connectivity import TileConnectivity
+from mothership.gui.planet_view.tile_occupancy import TileOccupancy
+
+# Tiles are positioned in world coordinates, so the tile size is always one (see Camera)
+TILE_SIZE = 1
+
+# Distance below which two joints are considered to be at the same position
+JOINT_EPSILON = 1e-3
 
+# Maximum distance between two joints that snap together
+SNAP_DISTANCE = TILE_SIZE / 10
 
-def try_attach(tile: DraggableTile, all_tiles: list[DraggableTile]):
+
+def try_attach(tile: DraggableTile, all_tiles: list[DraggableTile], occupancy: Optional[TileOccupancy] = None,
+               connectivity: Optional[TileConnectivity] = None):
     """
-    Tries to find potential joint matches between the given tile and the given list of all tiles
-    and attaches them together.
+    Snaps the given dropped tile onto the closest grid cell if one of its joints is within the snap distance of a
+    joint of a tile on a neighbouring cell and attaches the matching joints together.
+    Otherwise (or if the closest cell is occupied) the tile is left loose where it was dropped. Only a tile without
+    any neighbours is placed on its closest cell regardless, so that other tiles can attach to it.
     ('tile' is allowed to be included in 'all_tiles'. This function makes sure no tile is attached to itself)
     :param tile: The tile to attach to the others.
     :param all_tiles: The list of all potential attachment partners.
+    :param occupancy: Occupancy map of all tiles, kept up to date. Built from all_tiles if not given.
+    :param connectivity: Connectivity of all tiles to keep up to date with the new attachments (optional).
     """
 
-    # Skip calculation if the given tile is also the only tile
-    if len(all_tiles) == 1 and tile == all_tiles[0]:
-        tile.snapped_in_place = True
+    if occupancy is None:
+        occupancy = TileOccupancy(all_tiles)
+    occupancy.remove(tile)
+
+    cell = tile.cell()
+    if not occupancy.is_free(cell):
         return
 
-    # Check every tile for joint connections
-    for tile_b in all_tiles:
-        if tile_b == tile:
-            continue
-        try_attach_single(tile, tile_b, all_tiles)
+    # Joints can only be attached to tiles right next to the closest cell
+    neighbours = occupancy.neighbours(cell)
+    if not neighbours:
+        tile.pos = Vector2(cell)
+        occupancy.place(tile, cell)
+        if len(all_tiles) == 1 and tile == all_tiles[0]:
+            tile.snapped_in_place = True  # The tile is the whole planet
+        return
+
+    if not any(is_within_snap_distance(tile, tile_b) for tile_b in neighbours):
+        return
+
+    # GRID SNAP
+    tile.snap_to_pos(*cell)
+    occupancy.place(tile, cell)
+    for tile_b in neighbours:
+        try_attach_single(tile, tile_b, connectivity)
 
 
-def try_attach_single(tile_a: DraggableTile, tile_b: DraggableTile, all_tiles: list[DraggableTile]):
+def is_within_snap_distance(tile_a: DraggableTile, tile_b: DraggableTile) -> bool:
     """
-    Tries to attach tile_a to a single other tile_b. Uses information about the layout of all tiles to
-    calculate attachment parameters.
+    :return: Whether a center joint of tile_a is within the snap distance of a center joint of tile_b.
+        Sides are only ever attached as a whole and the center joints decide whether they can be
+        (see try_attach_single()).
+    """
+
+    for local_dir_b in tile_b.joints.keys():
+        joint_pos_b = tile_b.joint_pos(local_dir_b, 2)
+        for local_dir_a in tile_a.joints.keys():
+            if tile_a.joint_pos(local_dir_a, 2).distance_to(joint_pos_b) < SNAP_DISTANCE:
+                return True
+    return False
+
+
+def try_attach_single(tile_a: DraggableTile, tile_b: DraggableTile, connectivity: Optional[TileConnectivity] = None):
+    """
+    Tries to attach tile_a to a single other tile_b. Both tiles are expected to be placed on neighbouring cells,
+    so matching joints are at the same position.
     """
 
     # IMPORTANT: Maintain nesting structure. Looping over the sides of both tiles in the outer loops
@@ -39,12 +83,10 @@ def try_attach_single(tile_a: DraggableTile, tile_b: DraggableTile, all_tiles: l
 
     # SIDES OF TILE B
     for local_dir_b in tile_b.joints.keys():
-        global_dir_b = tile_b.local_direction_to_global(local_dir_b)
 
         # SIDES OF TILE A
         for local_dir_a in tile_a.joints.keys():
             side_attached = False  # Have any attachments been made in this side loop?
-            global_dir_a = tile_a.local_direction_to_global(local_dir_a)
 
             # For both joints, loop over the center joints with joint_num=2 first. If a2 and b2 cannot
             # be attached, skip this side because we only want attachments of all 3 joints and the center joints
@@ -56,36 +98,26 @@ def try_attach_single(tile_a: DraggableTile, tile_b: DraggableTile, all_tiles: l
                 if not tile_b.is_joint_free(local_dir_b, joint_num_b):
                     continue # Skip joints that already have other joints attached
 
-                joint_pos_b = get_joint_pos(tile_b, global_dir_b, joint_num_b)
+                joint_pos_b = tile_b.joint_pos(local_dir_b, joint_num_b)
 
                 # JOINTS OF TILE A
                 for joint_num_a in [2, 1, 3]:
                     if not tile_a.is_joint_free(local_dir_a, joint_num_a):
                         continue  # Skip joints that already have other joints attached
 
-                    joint_pos_a = get_joint_pos(tile_a, global_dir_a, joint_num_a)
+                    joint_pos_a = tile_a.joint_pos(local_dir_a, joint_num_a)
                     distance = joint_pos_a.distance_to(joint_pos_b)
-                    tile_size = tile_a.blank_image.get_height()
-
-                    # Connect if the distance between joints is less than a 10th of the tile size.
-                    # And if the tile has already snapped to another, the distance needs to be almost zero
-                    # to avoid cascading snapping.
-                    if (not tile_a.snapped_in_place and distance < tile_size / 10) or distance < 1:
 
-                        # SNAP OFFSET
-                        snap_offset = joint_pos_b - joint_pos_a
-                        if would_overlap(tile_a, tile_b, all_tiles, snap_offset):
-                            break
-
-                        if not tile_a.snapped_in_place: # Avoid cascading snapping
-                            tile_a.snap_to_pos(tile_a.rect.x + snap_offset.x, tile_a.rect.y + snap_offset.y)
-                            tile_b.snapped_in_place = True
+                    if distance < JOINT_EPSILON:
+                        tile_b.snapped_in_place = True  # Tiles placed without neighbours are loose until now
 
                         # Attach
                         tile_a.attach_joint(local_dir_a, joint_num_a,
                                             tile_b.tile_id + "_joint_" + local_dir_b.abbreviation() + str(joint_num_b))
                         tile_b.attach_joint(local_dir_b, joint_num_b,
                                             tile_a.tile_id + "_joint_" + local_dir_a.abbreviation() + str(joint_num_a))
+                        if connectivity is not None:
+                            connectivity.union(tile_a, tile_b)
                         side_attached = True
                         break
 
@@ -102,73 +134,12 @@ def try_attach_single(tile_a: DraggableTile, tile_b: DraggableTile, all_tiles: l
                 return
 
 
-def would_overlap(tile_a: DraggableTile, tile_b: DraggableTile, all_tiles: list[DraggableTile], snap_offset: Vector2):
-    """
-    :return: Whether snapping tile_a to tile_b with the given snap offset would result in any tiles overlapping.
-    """
-
-    tile_a_moved = tile_a.rect.move(snap_offset)
-    for tile in all_tiles:
-        if tile != tile_a and tile_a_moved.colliderect(tile):
-            return True
-
-        # Extra condition snapped_in_places only here, otherwise tile_a-tile_b collision can not be detected if
-        # they are both not snapped into place yet.
-        elif tile != tile_b and tile.snapped_in_place and tile_b.rect.colliderect(tile):
-            return True
-    return False
-
-
-def get_joint_pos(tile: DraggableTile, direction: Direction, joint_num: int) -> Vector2:
-    """
-    Gets the screen coordinates of the given tile's joint at the given global direction and joint number.
-    Considers translation and rotation of the tile.
-    (Note: Joint number follows the project rules -> counting up from SOUTH to NORTH and WEST to EAST relative
-    to the tile. This means the global joint number ordering can be different based on tile rotation)
-    """
-
-    tile_size = tile.blank_image.get_height()
-    joint_pos = Vector2(tile.rect.x, tile.rect.y)
-
-    # Adjust joint num for joint offset based on rotation to match ordering pre rotation
-    # (counting up towards north and east)
-    if tile.rotation_deg == 0 and direction.value % 180 == 90 or \
-            tile.rotation_deg == 180 and direction.value % 180 == 0 or \
-            tile.rotation_deg == 270:
-        joint_num_adjusted = 4 - joint_num # inverse ordering
-    else:
-        joint_num_adjusted = joint_num
-
-    # JOINT OFFSET
-    joint_offset: float
-    if joint_num_adjusted == 1:
-        joint_offset = tile_size * 12/100
-    elif joint_num_adjusted == 2:
-        joint_offset = tile_size / 2
-    else:
-        joint_offset = tile_size - tile_size * 12/100
-
-    # DIRECTION BASED COORDINATES
-    if direction == Direction.NORTH:
-        joint_pos.x += joint_offset
-
-    elif direction == Direction.EAST:
-        joint_pos.x += tile_size
-        joint_pos.y += joint_offset
-
-    elif direction == Direction.SOUTH:
-        joint_pos.x += joint_offset
-        joint_pos.y += tile_size
-
-    elif direction == Direction.WEST:
-        joint_pos.y += joint_offset
-
-    return joint_pos
-
-
-def detach_from_others(tile: DraggableTile, all_tiles: list[DraggableTile]):
+def detach_from_others(tile: DraggableTile, all_tiles: list[DraggableTile],
+                       connectivity: Optional[TileConnectivity] = None):
     """
     Detaches the given tile from the other tiles.
+    :param connectivity: Connectivity of all tiles to keep up to date (optional). Expects the tile's own joints
+        to be detached already (see DraggableTile.handle_drag_event()).
     """
 
     for tile_b in all_tiles:
@@ -177,34 +148,29 @@ def detach_from_others(tile: DraggableTile, all_tiles: list[DraggableTile]):
 
         for direction_b in tile_b.joints.keys():
             for joint_num_b in range(1, 4):
-                if tile.tile_id in tile_b.joints.get(direction_b)[joint_num_b - 1]:
+                if tile_b.joints.get(direction_b)[joint_num_b - 1].split("_joint")[0] == tile.tile_id:
                     tile_b.detach_joint(direction_b, joint_num_b)
 
+    if connectivity is not None:
+        connectivity.remove(tile)
+
 
-def all_tiles_form_one_planet(all_tiles: list[DraggableTile]) -> bool:
+def all_tiles_form_one_planet(all_tiles: list[DraggableTile],
+                              connectivity: Optional[TileConnectivity] = None) -> bool:
     """
     Returns whether the given list of tiles is fully connected into a single planet and not multiple
-    different planets.
+    different planets. Tiles count as connected if any of their joints are attached to each other.
+    :param connectivity: Up to date connectivity of all tiles (see try_attach()). Makes the check O(1).
+        Built from the joints of all tiles if not given.
     """
 
-    # Skip calculation if there is only one tile
-    if len(all_tiles) == 1 and all_tiles[0].snapped_in_place:
-        return True
-
-    # Begin with one tile and try to reach all tiles from it -> Success: return True
-    id_to_tile: dict[str, DraggableTile] = {t.tile_id: t for t in all_tiles}
-    reached_tile_ids: set[str] = set()
-    tile_stack: deque[DraggableTile] = deque()
-    tile_stack.append(all_tiles[0])
-
-    while tile_stack:
-        if len(reached_tile_ids) == len(id_to_tile):
-            return True
-
-        cur_tile = tile_stack.pop()
-        for direction in cur_tile.joints.keys():
-            connected_tile_id = cur_tile.joints.get(direction)[0].split("_joint")[0]
-            if connected_tile_id != "None" and connected_tile_id not in reached_tile_ids:
-                tile_stack.append(id_to_tile.get(connected_tile_id))
-                reached_tile_ids.add(connected_tile_id)
-    return False
+    if not all_tiles:
+        return False
+
+    # A single tile only needs to be snapped in place
+    if len(all_tiles) == 1:
+        return all_tiles[0].snapped_in_place
+
+    if connectivity is None:
+        connectivity = TileConnectivity(all_tiles)
+    return connectivity.component_count == 1
@@ -1,10 +1,16 @@
 from __future__ import annotations
+import copy
 import sys
 from enum import Enum
 from typing import Optional
 import pygame
 from pygame.math import Vector2
 from mothership.gui.planet_view import joint_attacher
+from mothership.gui.planet_view.camera import Camera
+from mothership.gui.planet_view.tile_connectivity import TileConnectivity
+from mothership.gui.planet_view.tile_grid import TileGrid
+from mothership.gui.planet_view.tile_occupancy import TileOccupancy
+from mothership.gui.planet_view.tile_images import TileImages
 from planets.code.parsing import planet_parser
 from mothership.gui.planet_view.tile import DraggableTile
 from mothership.update_event import UpdateEvent, SwitchedToPlanetMode, TileGrabbed, TileReleased
@@ -20,9 +26,32 @@ class PlanetView:
 
     # PYGAME
     screen: pygame.surface
+    camera: Camera
+
+    # RENDERING
+    BACKGROUND_COLOR = (25, 25, 25)
+    MAX_DIRTY_RECTS = 32  # Above this, redrawing the whole screen is cheaper than redrawing each rect
+    drawn_states: dict[DraggableTile, tuple]  # Draw state (see DraggableTile.draw_state()) of each tile on screen
+    drawn_rects: dict[DraggableTile, pygame.Rect]  # Screen area of each tile on screen
+    drawn_top_tile: Optional[DraggableTile]  # Tile that was drawn on top of the others
+    drawn_camera: tuple  # Camera state of the last render
+    needs_full_redraw: bool
+    show_joints: bool  # Debug overlay of the tile joints (toggled with J)
+
+    # PLANET MODE COMPOSITE (The locked planet is baked into a single surface, see render_composite())
+    COMPOSITE_MARGIN = 0.5  # Fraction of the screen size that is baked beyond each screen edge
+    composite: Optional[pygame.Surface]
+    composite_area: pygame.Rect  # Area of the composite in zoomed world pixels (world position * tile size)
+    composite_key: tuple  # Tile size and draw versions of the images the composite was baked with
+    composite_images: list[tuple[TileImages, bool, int]]  # Distinct (images, blank, size) drawn into the composite
+    composite_drawn_pos: Optional[tuple[int, int]]  # Screen position the composite was last drawn at
+    planet_bounds: pygame.Rect  # World area covered by the locked tiles (in tiles)
 
     # TILES
     draggable_tiles: list[DraggableTile]
+    tile_grid: TileGrid
+    occupancy: TileOccupancy  # Which tile is placed on which grid cell
+    connectivity: TileConnectivity  # Which tiles are attached to each other
     dragged_tile: Optional[DraggableTile]
     tile_data: list[Tile]
 
@@ -47,8 +76,31 @@ class PlanetView:
         self.screen = pygame.display.set_mode((1400, 800), pygame.RESIZABLE)
         pygame.display.set_caption("Planet view")
 
+        # CAMERA (Tiles start out at the world origin)
+        base_tile_size = draggable_tiles[0].images.size if draggable_tiles else 400
+        self.camera = Camera(base_tile_size, offset=Vector2(500, 500))
+
+        # RENDERING
+        self.drawn_states = dict()
+        self.drawn_rects = dict()
+        self.drawn_top_tile = None
+        self.drawn_camera = tuple()
+        self.needs_full_redraw = True
+        self.show_joints = False
+
+        # PLANET MODE COMPOSITE
+        self.composite = None
+        self.composite_area = pygame.Rect(0, 0, 0, 0)
+        self.composite_key = tuple()
+        self.composite_images = list()
+        self.composite_drawn_pos = None
+        self.planet_bounds = pygame.Rect(0, 0, 0, 0)
+
         # PLANET TILES
         self.draggable_tiles = draggable_tiles
+        self.tile_grid = TileGrid(draggable_tiles)
+        self.occupancy = TileOccupancy(draggable_tiles)
+        self.connectivity = TileConnectivity(draggable_tiles)
         self.dragged_tile = None
         self.tile_data = tile_data
 
@@ -73,8 +125,9 @@ class PlanetView:
 
         self.mode_update()
         self.handle_events()
-        self.render()
-        pygame.display.flip()
+        dirty_rects = self.render()
+        if dirty_rects:
+            pygame.display.update(dirty_rects)
 
         return self.update_events.copy()
 
@@ -100,16 +153,29 @@ class PlanetView:
             if event.type == pygame.QUIT:
                 sys.exit()
 
+            # WINDOW (The window contents might have been lost)
+            if event.type in [pygame.VIDEORESIZE, pygame.WINDOWEXPOSED, pygame.WINDOWSIZECHANGED]:
+                self.needs_full_redraw = True
+
             # KEY EVENTS
             if event.type == pygame.KEYDOWN:
                 # BLANK MODE
                 if event.key == pygame.K_b:
                     for tile in self.draggable_tiles:
                         tile.set_blank_mode(not tile.blank_mode)
+                    self.composite = None
+
+                # JOINT OVERLAY
+                if event.key == pygame.K_j:
+                    self.show_joints = not self.show_joints
+                    self.needs_full_redraw = True
 
             # SCREEN DRAG
             self.drag_screen(event)
 
+            # ZOOM
+            self.zoom(event)
+
         if self.mode == self.Mode.EDIT:
             self.handle_events_edit_mode(events)
         elif self.mode == self.Mode.PLANET:
@@ -126,30 +192,35 @@ class PlanetView:
             # KEY EVENTS
             if event.type == pygame.KEYDOWN:
                 # ROTATE TILE
-                if event.key == pygame.K_r:
-                    for tile in self.draggable_tiles:
-                        if tile.is_dragging:
-                            tile.rotate_right()
+                if event.key == pygame.K_r and self.dragged_tile is not None:
+                    self.dragged_tile.rotate_right()
 
             # TILE DRAG
             keys = pygame.key.get_pressed()
             if not keys[pygame.K_LSHIFT]:
-                # reversed so the one drawn last is grabbed first
-                for tile in self.draggable_tiles.__reversed__():
-                    tile.handle_drag_event(event)
-                    if tile.is_dragging:
-                        self.dragged_tile = tile
-                        break
+                # Only the tile drawn on top at the mouse position can be grabbed (see TileGrid)
+                if self.dragged_tile is None and event.type == pygame.MOUSEBUTTONDOWN:
+                    tile = self.tile_grid.tile_at(self.camera.screen_to_world(*event.pos))
+                    if tile is not None:
+                        tile.handle_drag_event(event, self.camera)
+                        if tile.is_dragging:
+                            self.dragged_tile = tile
+
+                elif self.dragged_tile is not None:
+                    self.dragged_tile.handle_drag_event(event, self.camera)
+                    self.tile_grid.update(self.dragged_tile)
 
                 if self.dragged_tile is not None:
                     # GRABBED TILE
                     if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                        joint_attacher.detach_from_others(self.dragged_tile, self.draggable_tiles)
+                        joint_attacher.detach_from_others(self.dragged_tile, self.draggable_tiles, self.connectivity)
                         self.update_events.append(TileGrabbed())
 
                     # RELEASED TILE
                     elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
-                        joint_attacher.try_attach(self.dragged_tile, self.draggable_tiles)
+                        joint_attacher.try_attach(self.dragged_tile, self.draggable_tiles, self.occupancy,
+                                                  self.connectivity)
+                        self.tile_grid.update(self.dragged_tile)  # Snapped to the grid
                         self.dragged_tile = None
                         self.update_events.append(TileReleased())
 
@@ -186,25 +257,199 @@ class PlanetView:
             dy = event.pos[1] - self.last_mouse_pos.y
 
             self.last_mouse_pos = Vector2(event.pos[0], event.pos[1])
-            for tile in self.draggable_tiles:
-                tile.rect = tile.rect.move(dx, dy)
+            self.camera.pan(dx, dy)
+
+    def zoom(self, event):
+        """
+        Handle zoom events. Scrolling the mouse wheel zooms the camera in or out around the mouse cursor.
+        Tiles draw themselves at the new size from their own cached zoom levels.
+        """
+
+        if event.type != pygame.MOUSEWHEEL or self.dragged_tile is not None:
+            return
+
+        mouse_x, mouse_y = pygame.mouse.get_pos()
+        self.camera.zoom(1 if event.y > 0 else -1, mouse_x, mouse_y)
+
+    def render(self) -> list[pygame.Rect]:
+        """
+        Renders the parts of the planet view that changed since the last render using pygame.
+        Tiles are compared to the state they were last drawn in, so dragging, rotating, switching modes and
+        toggling blank mode only redraw the affected areas and nothing is drawn while the view is idle.
+        Moving the camera redraws the whole screen. Only the tiles within the screen are ever looked at (see TileGrid).
+
+        :return: The areas of the screen that were redrawn and need to be updated
+        """
+
+        if self.mode == self.Mode.PLANET:
+            return self.render_composite()
+
+        screen_rect = self.screen.get_rect()
+        visible_tiles = self.visible_tiles(screen_rect)
+
+        camera_state = (self.camera.offset.x, self.camera.offset.y, self.camera.tile_size)
+        if camera_state != self.drawn_camera:
+            self.needs_full_redraw = True
+
+        # DIRTY RECTS
+        dirty_rects: list[pygame.Rect] = list()
+        if self.dragged_tile is not self.drawn_top_tile:
+            for tile in [self.dragged_tile, self.drawn_top_tile]:
+                if tile is not None:
+                    dirty_rects.append(tile.screen_rect(self.camera))
+
+        new_states: dict[DraggableTile, tuple] = dict()
+        new_rects: dict[DraggableTile, pygame.Rect] = dict()
+        for tile in visible_tiles:
+            new_rects[tile] = tile.screen_rect(self.camera)
+            new_states[tile] = tile.draw_state(new_rects[tile])
+            if self.drawn_states.get(tile) != new_states[tile]:
+                if tile in self.drawn_rects:
+                    dirty_rects.append(self.drawn_rects[tile])
+                dirty_rects.append(new_rects[tile])
+
+        # Tiles that left the screen
+        for tile, rect in self.drawn_rects.items():
+            if tile not in new_rects:
+                dirty_rects.append(rect)
+
+        dirty_rects = [rect.clip(screen_rect) for rect in dirty_rects if rect.colliderect(screen_rect)]
+        if self.needs_full_redraw or len(dirty_rects) > self.MAX_DIRTY_RECTS:
+            dirty_rects = [screen_rect]
+        elif dirty_rects and self.show_joints:
+            dirty_rects = [screen_rect]  # Joints stick out of their tiles and change with the other tiles
+
+        self.drawn_states = new_states
+        self.drawn_rects = new_rects
+        self.drawn_top_tile = self.dragged_tile
+        self.drawn_camera = camera_state
+        self.needs_full_redraw = False
+        if not dirty_rects:
+            return dirty_rects  # Idle
+
+        # REDRAW
+        for dirty_rect in dirty_rects:
+            self.screen.set_clip(dirty_rect)
+
+            # BACKGROUND
+            self.screen.fill(self.BACKGROUND_COLOR)
+
+            # TILES
+            for tile in self.visible_tiles(dirty_rect):
+                if tile != self.dragged_tile:  # Draw all other tiles first
+                    tile.draw(self.screen, self.camera, is_planet_mode=False)
+
+            if self.dragged_tile:  # Draw dragged tile on top
+                self.dragged_tile.draw(self.screen, self.camera, is_planet_mode=False)
+
+        self.screen.set_clip(None)
+        if self.show_joints:
+            self.draw_joints(visible_tiles)
+        return dirty_rects
+
+    def render_composite(self) -> list[pygame.Rect]:
+        """
+        Renders the locked planet in planet mode. The tiles are baked into a single composite surface once and then
+        drawn with one blit, so panning costs a single blit and nothing is drawn while the view is idle.
+        The composite only covers the screen plus a margin around it and is re-baked when blank mode is toggled,
+        the zoom level changes, one of the baked tile images finished loading in the background or the screen leaves
+        the baked area.
+
+        :return: The areas of the screen that were redrawn and need to be updated
+        """
+
+        screen_rect = self.screen.get_rect()
+        tile_size = self.camera.tile_size
+        origin = (round(self.camera.offset.x), round(self.camera.offset.y))  # Screen position of the world origin
+
+        # Screen and planet area in zoomed world pixels
+        view = screen_rect.move(-origin[0], -origin[1])
+        bounds = pygame.Rect(self.planet_bounds.x * tile_size, self.planet_bounds.y * tile_size,
+                             self.planet_bounds.w * tile_size, self.planet_bounds.h * tile_size)
+        needed = view.clip(bounds)
+
+        # BAKE
+        key = (tile_size, self.composite_image_versions())
+        if needed.w > 0 and needed.h > 0:
+            if self.composite is None or key != self.composite_key or not self.composite_area.contains(needed):
+                self.bake_composite(view.inflate(2 * round(screen_rect.w * self.COMPOSITE_MARGIN),
+                                                 2 * round(screen_rect.h * self.COMPOSITE_MARGIN)).clip(bounds))
+                self.composite_drawn_pos = None
+
+        composite_pos = (origin[0] + self.composite_area.x, origin[1] + self.composite_area.y)
+        if not self.needs_full_redraw and composite_pos == self.composite_drawn_pos:
+            return []  # Idle
+
+        # REDRAW
+        self.screen.fill(self.BACKGROUND_COLOR)
+        if self.composite is not None:
+            self.screen.blit(self.composite, composite_pos)
+        if self.show_joints:
+            self.draw_joints(self.visible_tiles(screen_rect))
+
+        self.composite_drawn_pos = composite_pos
+        self.needs_full_redraw = False
+        return [screen_rect]
+
+    def bake_composite(self, area: pygame.Rect):
+        """
+        Draws all tiles within the given area (in zoomed world pixels) into the planet mode composite.
+        """
+
+        tile_size = self.camera.tile_size
+        self.composite = pygame.Surface(area.size, 0, self.screen)
+        self.composite.fill(self.BACKGROUND_COLOR)
+        self.composite_area = area
+
+        # Same zoom level, but with the top left corner of the area at the origin of the composite
+        bake_camera = copy.copy(self.camera)
+        bake_camera.offset = Vector2(-area.x, -area.y)
+        baked_images = dict()  # Ordered set of the drawn images
+        for tile in self.tile_grid.query(Vector2(area.left / tile_size, area.top / tile_size),
+                                         Vector2(area.right / tile_size, area.bottom / tile_size)):
+            tile.draw(self.composite, bake_camera, is_planet_mode=True)
+            baked_images[(tile.images, tile.blank_mode, tile.screen_rect(bake_camera).width)] = None
+
+        self.composite_images = list(baked_images.keys())
+        self.composite_key = (tile_size, self.composite_image_versions())
+
+    def composite_image_versions(self) -> tuple:
+        """
+        Returns the draw versions of the images the composite was baked with. They only change when one of these
+        images replaced or can replace a stand-in, not when any other image (e.g. a prefetched variant) finished loading.
+        """
+
+        return tuple(images.draw_version(blank, size) for images, blank, size in self.composite_images)
+
+    def draw_joints(self, tiles: list[DraggableTile]):
+        """
+        Draws the debug overlay of the joints of the given tiles.
+        """
+
+        for tile in tiles:
+            tile.draw_joints(self.screen, self.camera)
 
-    def render(self):
+    def visible_tiles(self, area: pygame.Rect) -> list[DraggableTile]:
         """
-        Renders the planet view using pygame.
+        Returns the tiles within the given screen area in draw order.
         """
 
-        # BACKGROUND
-        self.screen.fill((25, 25, 25))
+        return self.tile_grid.query(self.camera.screen_to_world(area.left, area.top),
+                                    self.camera.screen_to_world(area.right, area.bottom))
+
+    def locked_tile_bounds(self) -> pygame.Rect:
+        """
+        Returns the world area covered by the tiles, which are all snapped to whole tile positions in planet mode.
+        """
 
-        # TILES
-        is_planet_mode = self.mode == self.Mode.PLANET
-        for tile in self.draggable_tiles:
-            if tile != self.dragged_tile:  # Draw all other tiles first
-                tile.draw(self.screen, is_planet_mode)
+        if not self.draggable_tiles:
+            return pygame.Rect(0, 0, 0, 0)
 
-        if self.dragged_tile:  # Draw dragged tile on top
-            self.dragged_tile.draw(self.screen, is_planet_mode)
+        min_x = min(round(tile.pos.x) for tile in self.draggable_tiles)
+        min_y = min(round(tile.pos.y) for tile in self.draggable_tiles)
+        max_x = max(round(tile.pos.x) for tile in self.draggable_tiles)
+        max_y = max(round(tile.pos.y) for tile in self.draggable_tiles)
+        return pygame.Rect(min_x, min_y, max_x - min_x + 1, max_y - min_y + 1)
 
     def finish_planet(self):
         """
@@ -233,7 +478,7 @@ class PlanetView:
             return False
         if self.mode != self.Mode.EDIT:
             return False
-        return joint_attacher.all_tiles_form_one_planet(self.draggable_tiles)
+        return joint_attacher.all_tiles_form_one_planet(self.draggable_tiles, self.connectivity)
 
     def switch_mode(self, new_mode: Mode) -> bool:
         """
@@ -246,11 +491,16 @@ class PlanetView:
 
         if self.mode == self.Mode.PLANET:
             self.mode = new_mode
+            self.composite = None  # Free the composite
+            self.needs_full_redraw = True
             return True
 
         elif self.mode == self.Mode.EDIT:
             if new_mode == self.Mode.PLANET and self.planet is not None:
                 self.mode = self.Mode.PLANET
+                self.planet_bounds = self.locked_tile_bounds()
+                self.composite = None
+                self.needs_full_redraw = True
                 return True
 
         return False
@@ -1,61 +1,73 @@
 import pygame
 from pygame.math import Vector2
-import cairosvg
-import io
+from mothership.gui.planet_view.camera import Camera
+from mothership.gui.planet_view.tile_images import TileImages
 from util.direction import Direction
 
 
 class DraggableTile:
     """
-    Draggable image class representing a single map tile. Created from svg and data files.
-    Keeps track of rotation and joint connections to other tiles.
+    Draggable image class representing a single map tile. Created from the detailed and blank versions of the
+    tile's svg files, which are only materialized once they are drawn (see TileImages). Keeps track of rotation and joint connections to other tiles.
+    A tile design can be placed multiple times, in which case all instances share the same images and tile data.
     """
 
-    tile_id: str # e.g. 'tile_a'
+    tile_id: str # Unique id of this placement, e.g. 'tile_a' or 'tile_a#2' for the second instance of tile_a
+    design_id: str # Id of the tile design (i.e. of the tile data and svg files), e.g. 'tile_a'
 
     # DISPLAY
-    blank_image: pygame.Surface
-    detailed_image: pygame.Surface
+    images: TileImages
     blank_mode: bool
 
     # CONNECTING
     joints: dict[Direction, list[str]] # Direction: list of 'None' or joint id (e.g. 'tile_b_joint_W2')
     snapped_in_place: bool
+    # (Local direction, joint number) -> world position of the joint. Cached, see joint_positions()
+    _joint_positions: dict[tuple[Direction, int], Vector2]
+    _joint_positions_key: tuple  # Position and rotation the joint positions were computed for
 
     # While rotate_right() is -90 degrees in screen space, it is +90 for rotation_deg so that it matches
     # the degree pattern used by global directions (e.g. EAST = 90, SOUTH = 180)
     rotation_deg: int
 
+    # POSITION (World coordinates of the top left corner in tiles, see Camera)
+    pos: Vector2
+
     #DRAGGING
     is_dragging: bool
-    rect: pygame.Rect
-    offset_x: float
-    offset_y: float
+    grab_offset: Vector2  # World offset from the mouse to the tile position while dragging
 
-    def __init__(self, tile_id: str, svg_file: str, svg_blank_file: str, pos: Vector2, scale: float = 1.0):
+    def __init__(self, tile_id: str, images: TileImages, pos: Vector2, design_id: str = None):
 
         self.tile_id = tile_id
+        self.design_id = design_id or tile_id
         self.joints = {direction: ["None"] * 3
                        for direction in [Direction.NORTH, Direction.EAST, Direction.SOUTH, Direction.WEST]}
         self.snapped_in_place = False
-
-        # Assumes that the user has created the tile svg with the correct resolution :)
-        original_size = 1000
-        scaled_width = int(original_size * scale)
-        scaled_height = int(original_size * scale)
+        self._joint_positions = dict()
+        self._joint_positions_key = tuple()
 
         # DISPLAY
-        png_data = cairosvg.svg2png(url=svg_file, output_width=scaled_width, output_height=scaled_height)
-        self.detailed_image = pygame.image.load(io.BytesIO(png_data))
-
-        png_blank_data = cairosvg.svg2png(url=svg_blank_file, output_width=scaled_width, output_height=scaled_height)
-        self.blank_image = pygame.image.load(io.BytesIO(png_blank_data))
+        self.images = images
         self.blank_mode = False
 
+        # POSITION
+        self.pos = Vector2(pos)
+
         # DRAGGING
-        self.rect = self.detailed_image.get_rect(topleft=(pos.x, pos.y))
         self.rotation_deg = 0
         self.is_dragging = False
+        self.grab_offset = Vector2(0, 0)
+
+    def node_id(self, node_name: str) -> str:
+        """
+        Returns the planet-wide id of the given node (or path point, e.g. 'bolvor:N') of the tile design.
+        Nodes of designs that are placed multiple times are namespaced with the instance suffix of the placement
+        (e.g. 'bolvor#2' or 'bolvor#2:N' on 'tile_a#2').
+        """
+
+        name, separator, direction = node_name.partition(":")
+        return name + self.tile_id[len(self.design_id):] + separator + direction
 
     def set_blank_mode(self, mode: bool):
         """
@@ -65,10 +77,23 @@ class DraggableTile:
         self.blank_mode = mode
 
     def snap_to_pos(self, x: float, y: float):
-        self.rect.x = x
-        self.rect.y = y
+        self.pos = Vector2(x, y)
         self.snapped_in_place = True
 
+    def cell(self) -> tuple[int, int]:
+        """
+        Returns the grid cell (i.e. the whole world position) the tile is placed on or closest to.
+        """
+
+        return round(self.pos.x), round(self.pos.y)
+
+    def screen_rect(self, camera: Camera) -> pygame.Rect:
+        """
+        Returns the screen area of the tile as seen through the given camera.
+        """
+
+        return camera.screen_rect(self.pos)
+
     def detach_joints(self):
         """
         Detaches all of the tile's joints.
@@ -95,6 +120,28 @@ class DraggableTile:
 
         return local_dir.rotated(self.rotation_deg)
 
+    def joint_positions(self) -> dict[tuple[Direction, int], Vector2]:
+        """
+        Returns the world positions of all 12 joints, keyed by local direction and joint number.
+        Only recomputed after the tile was moved, snapped or rotated. Do not modify the returned positions.
+        """
+
+        key = (self.pos.x, self.pos.y, self.rotation_deg)
+        if key != self._joint_positions_key:
+            self._joint_positions = {(local_dir, joint_num): self.pos + offset for (local_dir, joint_num), offset
+                                     in _JOINT_OFFSETS[self.rotation_deg].items()}
+            self._joint_positions_key = key
+        return self._joint_positions
+
+    def joint_pos(self, joint_dir: Direction, joint_num: int) -> Vector2:
+        """
+        Returns the world position of the given joint. Considers translation and rotation of the tile.
+        :param joint_dir: The local direction of the joint
+        :param joint_num: Which of the three joints at this direction (range [1-3])
+        """
+
+        return self.joint_positions()[(joint_dir, joint_num)]
+
     def is_joint_free(self, joint_dir: Direction, joint_num: int) -> bool:
         """
         Returns whether the given joint is free from any attachments.
@@ -123,46 +170,118 @@ class DraggableTile:
 
         self.joints.get(joint_dir)[joint_num-1] = "None"
 
-    def draw(self, screen: pygame.Surface, is_planet_mode: bool):
+    def alpha(self, is_planet_mode: bool) -> int:
         """
-        Draws the tile to the given screen.
+        Returns the alpha level the tile is drawn with.
         """
+
         max_alpha = 255 if is_planet_mode else 180
+        return max_alpha if self.snapped_in_place else 90
 
-        image: pygame.Surface
-        if self.blank_mode:
-            image = self.blank_image.copy()
-        else:
-            image = self.detailed_image.copy()
+    def draw_state(self, screen_rect: pygame.Rect) -> tuple:
+        """
+        Returns everything that determines what the tile looks like on screen at the given screen area in edit mode
+        (planet mode is drawn from a composite, see PlanetView.render_composite()).
+        The tile only needs to be redrawn if its draw state changed.
+        """
+
+        return (screen_rect.x, screen_rect.y, screen_rect.width, self.blank_mode, self.rotation_deg,
+                self.alpha(is_planet_mode=False), self.images.draw_version(self.blank_mode, screen_rect.width))
+
+    def draw(self, screen: pygame.Surface, camera: Camera, is_planet_mode: bool):
+        """
+        Draws the tile to the given screen as seen through the given camera.
+        """
 
-        image.set_alpha(max_alpha if self.snapped_in_place else 90)
-        screen.blit(image, self.rect)
+        # Display surfaces are cached per variant, size, rotation and alpha level and shared by all instances
+        rect = self.screen_rect(camera)
+        alpha = self.alpha(is_planet_mode)
+        screen.blit(self.images.get_display(self.blank_mode, rect.width, self.rotation_deg, alpha), rect)
+
+    def draw_joints(self, screen: pygame.Surface, camera: Camera):
+        """
+        Draws the joints of the tile as seen through the given camera for debugging:
+        Free joints are red, attached joints are green.
+        """
+
+        radius = max(2, camera.tile_size // 40)
+        for (joint_dir, joint_num), pos in self.joint_positions().items():
+            color = (220, 40, 40) if self.is_joint_free(joint_dir, joint_num) else (40, 220, 40)
+            pygame.draw.circle(screen, color, camera.world_to_screen(pos), radius)
 
     def rotate_right(self):
         """
         Rotates the tile to the right by 90 degrees.
         """
 
-        self.detailed_image = pygame.transform.rotate(self.detailed_image, -90)
-        self.blank_image = pygame.transform.rotate(self.blank_image, -90)
-
         # Use +90 to match the degree mapping of the direction class (e.g. EAST = 90)
         self.rotation_deg = (self.rotation_deg + 90) % 360
 
-    def handle_drag_event(self, event: pygame.event):
+    def handle_drag_event(self, event: pygame.event, camera: Camera):
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            if self.rect.collidepoint(event.pos):
+            if self.screen_rect(camera).collidepoint(event.pos):
                 self.is_dragging = True
                 self.snapped_in_place = False
                 self.detach_joints()
-                mouse_x, mouse_y = event.pos
-                self.offset_x = self.rect.x - mouse_x
-                self.offset_y = self.rect.y - mouse_y
+                self.grab_offset = self.pos - camera.screen_to_world(*event.pos)
 
         elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
             self.is_dragging = False
 
         elif event.type == pygame.MOUSEMOTION:
             if self.is_dragging:
-                self.rect.x = event.pos[0] + self.offset_x
-                self.rect.y = event.pos[1] + self.offset_y
+                self.pos = camera.screen_to_world(*event.pos) + self.grab_offset
+
+
+def _joint_offset(direction: Direction, joint_num: int, rotation_deg: int) -> Vector2:
+    """
+    Returns the position of the joint at the given global direction and joint number of a tile with the given rotation,
+    relative to the position of the tile (in tiles).
+    (Note: Joint number follows the project rules -> counting up from SOUTH to NORTH and WEST to EAST relative
+    to the tile. This means the global joint number ordering can be different based on tile rotation)
+    """
+
+    joint_pos = Vector2(0, 0)
+
+    # Adjust joint num for joint offset based on rotation to match ordering pre rotation
+    # (counting up towards north and east)
+    if rotation_deg == 0 and direction.value % 180 == 90 or \
+            rotation_deg == 180 and direction.value % 180 == 0 or \
+            rotation_deg == 270:
+        joint_num_adjusted = 4 - joint_num # inverse ordering
+    else:
+        joint_num_adjusted = joint_num
+
+    # JOINT OFFSET
+    joint_offset: float
+    if joint_num_adjusted == 1:
+        joint_offset = 12/100
+    elif joint_num_adjusted == 2:
+        joint_offset = 1 / 2
+    else:
+        joint_offset = 1 - 12/100
+
+    # DIRECTION BASED COORDINATES
+    if direction == Direction.NORTH:
+        joint_pos.x += joint_offset
+
+    elif direction == Direction.EAST:
+        joint_pos.x += 1
+        joint_pos.y += joint_offset
+
+    elif direction == Direction.SOUTH:
+        joint_pos.x += joint_offset
+        joint_pos.y += 1
+
+    elif direction == Direction.WEST:
+        joint_pos.y += joint_offset
+
+    return joint_pos
+
+
+# Rotation -> (local direction, joint number) -> joint position relative to the tile position
+_JOINT_OFFSETS: dict[int, dict[tuple[Direction, int], Vector2]] = {
+    rotation_deg: {(local_dir, joint_num): _joint_offset(local_dir.rotated(rotation_deg), joint_num, rotation_deg)
+                   for local_dir in Direction.real_directions_ordered() for joint_num in range(1, 4)}
+    for rotation_deg in [0, 90, 180, 270]
+}
@@ -0,0 +1,82 @@
+from mothership.gui.planet_view.tile import DraggableTile
+
+
+class TileConnectivity:
+    """
+    Disjoint-set (union-find) over the tiles, where two tiles are in the same set if they are connected by attached
+    joints, directly or through other tiles. Kept up to date incrementally by joint_attacher, so whether all tiles
+    form a single planet can be answered without traversing the board.
+    """
+
+    _tiles_by_id: dict[str, DraggableTile]
+    _parent: dict[DraggableTile, DraggableTile]
+    _members: dict[DraggableTile, list[DraggableTile]]  # Root tile -> all tiles of its set
+
+    def __init__(self, tiles: list[DraggableTile]):
+        self._tiles_by_id = {tile.tile_id: tile for tile in tiles}
+        self._parent = {tile: tile for tile in tiles}
+        self._members = {tile: [tile] for tile in tiles}
+
+        self._union_attached(tiles)
+
+    @property
+    def component_count(self) -> int:
+        """
+        Number of separate groups of connected tiles.
+        """
+
+        return len(self._members)
+
+    def find(self, tile: DraggableTile) -> DraggableTile:
+        """
+        Returns the root tile of the set the given tile belongs to.
+        """
+
+        root = tile
+        while self._parent[root] is not root:
+            root = self._parent[root]
+
+        # Path compression
+        while self._parent[tile] is not root:
+            self._parent[tile], tile = root, self._parent[tile]
+        return root
+
+    def union(self, tile_a: DraggableTile, tile_b: DraggableTile):
+        """
+        Merges the sets of the given tiles after they were attached to each other.
+        """
+
+        root_a, root_b = self.find(tile_a), self.find(tile_b)
+        if root_a is root_b:
+            return
+
+        # Union by size
+        if len(self._members[root_a]) < len(self._members[root_b]):
+            root_a, root_b = root_b, root_a
+        self._parent[root_b] = root_a
+        self._members[root_a].extend(self._members.pop(root_b))
+
+    def remove(self, tile: DraggableTile):
+        """
+        Splits the given tile off after it was detached from all other tiles. Union-find cannot undo unions,
+        so the set that contained the tile is rebuilt from the joints of its remaining tiles.
+        """
+
+        old_members = self._members.pop(self.find(tile))
+        for member in old_members:
+            self._parent[member] = member
+            self._members[member] = [member]
+
+        self._union_attached(old_members)
+
+    def _union_attached(self, tiles: list[DraggableTile]):
+        """
+        Merges the sets of the given tiles with the sets of all tiles attached to any of their joints.
+        """
+
+        for tile in tiles:
+            for joints in tile.joints.values():
+                for joint in joints:
+                    other = self._tiles_by_id.get(joint.split("_joint")[0])
+                    if other is not None:
+                        self.union(tile, other)
@@ -0,0 +1,75 @@
+import math
+from typing import Optional
+from pygame.math import Vector2
+from mothership.gui.planet_view.tile import DraggableTile
+
+Cell = tuple[int, int]
+
+
+class TileGrid:
+    """
+    Uniform grid spatial index over the world positions of the tiles (see Camera). Each cell is one tile size wide,
+    so every tile covers at most four cells and the tiles at a point or within an area can be found without
+    iterating over all tiles. Needs to be updated whenever a tile moves.
+    """
+
+    # Draw order of the tiles (i.e. their index in the planet view's tile list). Tiles drawn later are on top.
+    _order: dict[DraggableTile, int]
+    _cells: dict[Cell, list[DraggableTile]]
+    _tile_cells: dict[DraggableTile, list[Cell]]
+
+    def __init__(self, tiles: list[DraggableTile]):
+        self._order = {tile: i for i, tile in enumerate(tiles)}
+        self._cells = dict()
+        self._tile_cells = dict()
+
+        for tile in tiles:
+            self.update(tile)
+
+    def update(self, tile: DraggableTile):
+        """
+        Moves the given tile to the cells covered by its current position.
+        """
+
+        cells = _covered_cells(tile.pos.x, tile.pos.y, tile.pos.x + 1, tile.pos.y + 1)
+        old_cells = self._tile_cells.get(tile, [])
+        if cells == old_cells:
+            return
+
+        for cell in old_cells:
+            self._cells[cell].remove(tile)
+            if not self._cells[cell]:
+                del self._cells[cell]
+        for cell in cells:
+            self._cells.setdefault(cell, []).append(tile)
+        self._tile_cells[tile] = cells
+
+    def tile_at(self, point: Vector2) -> Optional[DraggableTile]:
+        """
+        Returns the topmost tile at the given world position or None if there is no tile.
+        """
+
+        hits = [tile for tile in self._cells.get((math.floor(point.x), math.floor(point.y)), [])
+                if tile.pos.x <= point.x < tile.pos.x + 1 and tile.pos.y <= point.y < tile.pos.y + 1]
+        return max(hits, key=self._order.get, default=None)
+
+    def query(self, top_left: Vector2, bottom_right: Vector2) -> list[DraggableTile]:
+        """
+        Returns all tiles that overlap the given world area, in draw order.
+        """
+
+        tiles: set[DraggableTile] = set()
+        for cell in _covered_cells(top_left.x, top_left.y, bottom_right.x, bottom_right.y):
+            tiles.update(self._cells.get(cell, []))
+
+        return sorted((tile for tile in tiles
+                       if tile.pos.x < bottom_right.x and top_left.x < tile.pos.x + 1
+                       and tile.pos.y < bottom_right.y and top_left.y < tile.pos.y + 1), key=self._order.get)
+
+
+def _covered_cells(x0: float, y0: float, x1: float, y1: float) -> list[Cell]:
+    """
+    Returns the cells covered by the given half-open world area [x0, x1) x [y0, y1).
+    """
+
+    return [(x, y) for x in range(math.floor(x0), math.ceil(x1)) for y in range(math.floor(y0), math.ceil(y1))]
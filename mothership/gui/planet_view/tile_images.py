@@ -0,0 +1,341 @@
+from __future__ import annotations
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+import pygame
+from mothership.io import svg_rasterizer
+from mothership.io.raster_cache import RasterCache
+
+
+class TileImageStore:
+    """
+    Store shared by the TileImages of all tiles. Keeps track of which images are materialized,
+    rasterizes images in a background thread and releases the least recently drawn images once the
+    materialized images exceed the memory budget.
+    """
+
+    # Images drawn within this many seconds are considered visible and are never released
+    _RECENT_USE_SECONDS = 1.0
+
+    raster_cache: Optional[RasterCache]
+    max_bytes: int
+
+    # (TileImages, blank, size) -> time of last use. Ordered from least to most recently used.
+    _materialized: OrderedDict[tuple[TileImages, bool, int], float]
+    _entry_bytes: dict[tuple[TileImages, bool, int], int]  # Including the rotated and display copies of each image
+    materialized_bytes: int
+
+    _background_executor: ThreadPoolExecutor
+
+    def __init__(self, raster_cache: Optional[RasterCache], max_bytes: int = 256 * 1024 * 1024):
+        self.raster_cache = raster_cache
+        self.max_bytes = max_bytes
+
+        self._materialized = OrderedDict()
+        self._entry_bytes = dict()
+        self.materialized_bytes = 0
+
+        self._background_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tile_images")
+
+    def load_rgba(self, svg_data: bytes, size: int):
+        """
+        Returns the raw RGBA pixel data of the given svg at the given size, from the raster cache if possible.
+        Safe to call from the background thread.
+        """
+
+        if self.raster_cache is not None:
+            rgba = self.raster_cache.get(svg_data, size, size)
+            if rgba is not None:
+                return rgba
+
+        rgba = svg_rasterizer.rasterize_svg(svg_data, size, size)
+        if self.raster_cache is not None:
+            self.raster_cache.put(svg_data, size, size, rgba)
+        return rgba
+
+    def add(self, images: TileImages, blank: bool, size: int):
+        """
+        Registers a newly materialized image and releases other images if the memory budget is exceeded.
+        """
+
+        key = (images, blank, size)
+        if key in self._materialized:
+            return
+
+        self._materialized[key] = time.monotonic()
+        self._entry_bytes[key] = size * size * 4
+        self.materialized_bytes += size * size * 4
+        self._release_over_budget()
+
+    def add_copy(self, images: TileImages, blank: bool, size: int):
+        """
+        Accounts for a copy (e.g. a rotated copy) of an already materialized image.
+        """
+
+        key = (images, blank, size)
+        if key in self._materialized:
+            self._entry_bytes[key] += size * size * 4
+            self.materialized_bytes += size * size * 4
+
+    def touch(self, images: TileImages, blank: bool, size: int):
+        """
+        Marks the given image as just drawn.
+        """
+
+        key = (images, blank, size)
+        self._materialized[key] = time.monotonic()
+        self._materialized.move_to_end(key)
+        self._release_over_budget()
+
+    def remove(self, images: TileImages, blank: bool, size: int):
+        key = (images, blank, size)
+        if self._materialized.pop(key, None) is not None:
+            self.materialized_bytes -= self._entry_bytes.pop(key)
+
+    def has_room_for(self, size: int) -> bool:
+        return self.materialized_bytes + size * size * 4 <= self.max_bytes
+
+    def submit(self, images: TileImages, blank: bool, size: int) -> Future:
+        """
+        Starts loading the given image in the background.
+        """
+
+        return self._background_executor.submit(self.load_rgba, images.svg_data(blank), size)
+
+    def _release_over_budget(self):
+        """
+        Releases the least recently drawn images until the materialized images fit into the memory budget.
+        """
+
+        now = time.monotonic()
+        while self.materialized_bytes > self.max_bytes and self._materialized:
+            (images, blank, size), last_use = next(iter(self._materialized.items()))
+            if now - last_use < self._RECENT_USE_SECONDS:
+                break  # Everything from here on is visible
+            images.release(blank, size)
+
+
+class TileImages:
+    """
+    The blank and detailed images of a single tile design at any number of sizes (zoom levels) and rotations,
+    materialized on demand. Shared by all placed instances of the design.
+
+    An image is only rasterized (or memory-mapped from the raster cache) when it is first drawn. Afterwards the
+    other variant is prefetched in the background so that toggling blank mode does not stall.
+    Each variant keeps a small LRU cache of sizes. Sizes that are not cached yet are rasterized in the background
+    while a one-time scaled copy of the nearest cached size is shown in their place.
+    Rotated images are derived from the unrotated image of the same size and shared by all instances with that rotation.
+    The same goes for the display-converted copies with an alpha level that are actually drawn (see get_display()).
+    The svgs themselves are only read once they need to be rasterized (e.g. never for images from a tile pack
+    until a new zoom level is drawn).
+    """
+
+    MAX_SIZES_PER_VARIANT = 3
+
+    store: TileImageStore
+    _read_svg: Callable[[bool], bytes]  # blank -> svg file content
+    _svg_data: dict[bool, bytes]  # blank -> svg file content that was already read
+    size: int  # The size the tile was loaded with
+    version: int  # Incremented whenever a cached surface changes its content (i.e. a stand-in is replaced)
+
+    _rgba: dict[tuple[bool, int], object]  # (blank, size) -> raw unrotated pixel data
+    _packed_rgba: dict[bool, object]  # blank -> raw unrotated pixel data at the loaded size from a tile pack
+    _surfaces: OrderedDict[tuple[bool, int], pygame.Surface]  # (blank, size) -> unrotated surface, LRU ordered
+    _rotated: dict[tuple[bool, int], dict[int, pygame.Surface]]  # (blank, size) -> rotation_deg -> rotated surface
+    # (blank, size) -> (rotation_deg, alpha) -> (surface it was created from, display surface)
+    _display: dict[tuple[bool, int], dict[tuple[int, int], tuple[pygame.Surface, pygame.Surface]]]
+    _stand_ins: set[tuple[bool, int]]  # Surfaces that are only scaled copies of another size
+    _pending: dict[tuple[bool, int], Future]  # (blank, size) -> background load of the raw pixel data
+
+    def __init__(self, store: TileImageStore, read_svg: Callable[[bool], bytes], size: int):
+        """
+        :param read_svg: Returns the content of the blank (True) or detailed (False) svg file
+        """
+
+        self.store = store
+        self._read_svg = read_svg
+        self._svg_data = dict()
+        self.size = size
+        self.version = 0
+
+        self._rgba = dict()
+        self._packed_rgba = dict()
+        self._surfaces = OrderedDict()
+        self._rotated = dict()
+        self._display = dict()
+        self._stand_ins = set()
+        self._pending = dict()
+
+    def svg_data(self, blank: bool) -> bytes:
+        """
+        Returns the content of the svg file of the given variant, reading it on first use.
+        """
+
+        if blank not in self._svg_data:
+            self._svg_data[blank] = self._read_svg(blank)
+        return self._svg_data[blank]
+
+    def set_rgba(self, blank: bool, rgba):
+        """
+        Hands over already rasterized pixel data of the given variant at the loaded size
+        (e.g. from parallel startup rasterization).
+        """
+
+        self._rgba[(blank, self.size)] = rgba
+        self.store.add(self, blank, self.size)
+
+    def set_packed_rgba(self, blank: bool, rgba):
+        """
+        Hands over memory-mapped pixel data of the given variant at the loaded size (from a tile pack).
+        Unlike set_rgba() this does not materialize the image. The data is kept when the image is released because
+        it is backed by the pack file and not by memory.
+        """
+
+        self._packed_rgba[blank] = rgba
+
+    def get(self, blank: bool, size: Optional[int] = None, rotation_deg: int = 0) -> pygame.Surface:
+        """
+        Returns the surface of the given variant at the given size (default: the loaded size) and rotation.
+        Might return a scaled stand-in while the actual size is being rasterized in the background.
+
+        :param rotation_deg: Same convention as DraggableTile.rotation_deg
+        """
+
+        size = size or self.size
+        key = (blank, size)
+
+        surface = self._surfaces.get(key)
+        if surface is None or (key in self._stand_ins and self._pending[key].done()):
+            surface = self._materialize(blank, size)
+
+        self._surfaces.move_to_end(key)
+        self.store.touch(self, blank, size)
+        self.prefetch(not blank, size)
+
+        if rotation_deg == 0:
+            return surface
+
+        rotated = self._rotated.setdefault(key, dict())
+        if rotation_deg not in rotated:
+            # While rotation_deg is +90 for a right rotation, pygame rotates counterclockwise
+            rotated[rotation_deg] = pygame.transform.rotate(surface, -rotation_deg)
+            self.store.add_copy(self, blank, size)
+        return rotated[rotation_deg]
+
+    def get_display(self, blank: bool, size: int, rotation_deg: int, alpha: int) -> pygame.Surface:
+        """
+        Returns a surface of the given variant, size and rotation that is converted to the display's pixel format and
+        has the given alpha level, ready to be blitted. Cached until the image is released or a stand-in is replaced.
+        """
+
+        source = self.get(blank, size)
+        display_variants = self._display.setdefault((blank, size), dict())
+        variant = display_variants.get((rotation_deg, alpha))
+        if variant is not None and variant[0] is source:
+            return variant[1]
+
+        # Rotate straight from the unrotated source, the rotated copy itself is never needed
+        surface = pygame.transform.rotate(source, -rotation_deg) if rotation_deg != 0 else source
+        surface = surface.convert_alpha() if pygame.display.get_surface() is not None else surface.copy()
+        surface.set_alpha(alpha)
+
+        if variant is None:
+            self.store.add_copy(self, blank, size)
+        display_variants[(rotation_deg, alpha)] = (source, surface)
+        return surface
+
+    def draw_version(self, blank: bool, size: int) -> tuple[int, bool]:
+        """
+        Returns a value that changes whenever the surface that get() would return for the given variant and size
+        changes its content, i.e. when a stand-in has been or is ready to be replaced.
+        """
+
+        key = (blank, size)
+        return self.version, key in self._stand_ins and self._pending[key].done()
+
+    def prefetch(self, blank: bool, size: int):
+        """
+        Starts loading the given image in the background unless it is already loaded or the memory
+        budget is exhausted.
+        """
+
+        key = (blank, size)
+        if key in self._rgba or key in self._pending or not self.store.has_room_for(size):
+            return
+        if size == self.size and blank in self._packed_rgba:
+            return  # Materializing from the pack is instant
+        self._pending[key] = self.store.submit(self, blank, size)
+        self.store.add(self, blank, size)  # Reserve the memory right away
+
+    def _materialize(self, blank: bool, size: int) -> pygame.Surface:
+        key = (blank, size)
+        rgba = self._rgba.get(key)
+        if rgba is None and size == self.size:
+            rgba = self._packed_rgba.get(blank)
+
+        if rgba is None:
+            pending = self._pending.get(key)
+            nearest = self._nearest_size(blank, size)
+
+            # SHOW NEAREST SIZE WHILE RASTERIZING IN THE BACKGROUND
+            if nearest is not None and (pending is None or not pending.done()):
+                if pending is None:
+                    self._pending[key] = self.store.submit(self, blank, size)
+                surface = pygame.transform.scale(self._surfaces[(blank, nearest)], (size, size))
+                self._stand_ins.add(key)
+                return self._add_surface(key, surface)
+
+            # Nothing to show in the meantime (first draw of this variant) -> load synchronously
+            self._pending.pop(key, None)
+            rgba = pending.result() if pending is not None else self.store.load_rgba(self.svg_data(blank), size)
+            self._rgba[key] = rgba
+
+        surface = svg_rasterizer.surface_from_rgba(rgba, size, size)
+        self._stand_ins.discard(key)
+        return self._add_surface(key, surface)
+
+    def _add_surface(self, key: tuple[bool, int], surface: pygame.Surface) -> pygame.Surface:
+        """
+        Adds the given surface to the size cache of its variant, releasing the least recently used size
+        of that variant if the cache is full.
+        """
+
+        if key in self._surfaces:
+            # Replacing a stand-in, which also invalidates its rotated and display copies
+            self._rotated.pop(key, None)
+            self._display.pop(key, None)
+            self.store.remove(self, *key)
+            self.version += 1
+        self._surfaces[key] = surface
+        self._surfaces.move_to_end(key)
+        self.store.add(self, *key)
+
+        sizes = [k for k in self._surfaces.keys() if k[0] == key[0]]
+        if len(sizes) > self.MAX_SIZES_PER_VARIANT:
+            self.release(*sizes[0])
+        return surface
+
+    def _nearest_size(self, blank: bool, size: int) -> Optional[int]:
+        """
+        Returns the cached size of the given variant that is closest to the given size (ignoring stand-ins).
+        """
+
+        sizes = [k[1] for k in self._surfaces.keys() if k[0] == blank and k not in self._stand_ins]
+        return min(sizes, key=lambda s: abs(s - size)) if sizes else None
+
+    def release(self, blank: bool, size: int):
+        """
+        Frees the given image. It is materialized again the next time it is drawn.
+        """
+
+        key = (blank, size)
+        pending = self._pending.pop(key, None)
+        if pending is not None:
+            pending.cancel()
+        self._rgba.pop(key, None)
+        self._surfaces.pop(key, None)
+        self._rotated.pop(key, None)
+        self._display.pop(key, None)
+        self._stand_ins.discard(key)
+        self.store.remove(self, blank, size)
@@ -0,0 +1,59 @@
+from typing import Optional
+from mothership.gui.planet_view.tile import DraggableTile
+from mothership.gui.planet_view.tile_grid import Cell
+
+# Offsets of the four cells next to a cell
+_NEIGHBOUR_OFFSETS = [(0, -1), (1, 0), (0, 1), (-1, 0)]
+
+
+class TileOccupancy:
+    """
+    Occupancy map of the world grid. Dropped tiles are placed on whole world positions (grid cells, see
+    joint_attacher.try_attach()), and each cell holds at most one placed tile. Finding the tile on a cell or the
+    neighbours of a tile is a dict lookup. Tiles that could not be placed (e.g. dropped too far from any joint or
+    onto an occupied cell) lie loose in between the cells and are not part of the map.
+    """
+
+    _tiles: dict[Cell, DraggableTile]
+    _cells: dict[DraggableTile, Cell]
+
+    def __init__(self, tiles: list[DraggableTile]):
+        self._tiles = dict()
+        self._cells = dict()
+
+        # Tiles that already lie on a cell are placed there, the first one wins if several lie on the same cell
+        for tile in tiles:
+            if tile.pos == tile.cell() and self.tile_at(tile.cell()) is None:
+                self.place(tile, tile.cell())
+
+    def tile_at(self, cell: Cell) -> Optional[DraggableTile]:
+        return self._tiles.get(cell)
+
+    def is_free(self, cell: Cell) -> bool:
+        return cell not in self._tiles
+
+    def place(self, tile: DraggableTile, cell: Cell):
+        """
+        Places the given tile on the given free cell, removing it from its previous cell.
+        """
+
+        self.remove(tile)
+        self._tiles[cell] = tile
+        self._cells[tile] = cell
+
+    def remove(self, tile: DraggableTile):
+        """
+        Removes the given tile from its cell (if it has been placed).
+        """
+
+        cell = self._cells.pop(tile, None)
+        if cell is not None:
+            del self._tiles[cell]
+
+    def neighbours(self, cell: Cell) -> list[DraggableTile]:
+        """
+        Returns the tiles placed on the four cells next to the given cell (north, east, south, west).
+        """
+
+        neighbours = [self._tiles.get((cell[0] + dx, cell[1] + dy)) for dx, dy in _NEIGHBOUR_OFFSETS]
+        return [tile for tile in neighbours if tile is not None]
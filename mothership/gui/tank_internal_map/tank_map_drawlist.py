@@ -0,0 +1,364 @@
+import math
+from typing import Optional
+import dearpygui.dearpygui as dpg
+from pygame import Vector2
+from mothership.gui.tank_internal_map.tank_map_renderer import TankMapRenderer
+from planets.code.node import Node
+from planets.code.path import Path
+from planets.code.planet import Planet
+from planets.code.route import Route
+from util.direction import Direction
+
+
+class TankMapDrawlist:
+    """
+    Retained-mode vector backend for displaying the internal map of the tank robot. Instead of rasterizing the map
+    and uploading it as a texture (see TankMapRenderer), every node and path is drawn as dearpygui drawlist items that
+    are kept between updates, keyed by the node or path id. Only the items of nodes and paths that changed since the
+    last update are replaced.
+
+    All items are positioned in world coordinates (see TankMapRenderer.world_pos()) and panning and zooming
+    is done by transforming the layers, so neither the size of the map nor the view affect the update cost.
+    The transform does not scale text, so the label texts are resized whenever the zoom changes instead.
+    When zoomed out, the label and unexplored path layers are hidden by the same level of detail rules as the image.
+    """
+
+    # Draw layers from bottom to top. Each layer has one draw node that applies the view transform.
+    LAYERS = ("stubs", "paths", "route", "nodes", "highlights", "labels")
+
+    # NODES
+    NODE_WIDTH = 55
+    NODE_HEIGHT = 36
+    LABEL_SIZE = 13
+    LABEL_MAX_CHARS = 7  # Longer node labels are abbreviated with '-'
+
+    # VIEW
+    MIN_ZOOM = 0.05
+    MAX_ZOOM = 4
+    ZOOM_STEP = 1.15  # Zoom factor per mouse wheel step
+    FIT_MARGIN = 100  # Margin around the nodes when fitting the view (in world pixels)
+
+    tag: str
+    width: int
+    height: int
+    world_nodes: dict[str, int]  # Layer name -> draw node holding all items of the layer
+
+    # Layer name ('stubs', 'paths' or 'nodes') -> element id -> (signature, draw items) of each drawn element.
+    # Elements are redrawn whenever their signature changes (see TankMapRenderer.elements()).
+    drawn: dict[str, dict[str, tuple[tuple, list[int]]]]
+    planet: Optional[Planet]  # Planet the items were drawn from
+    label_texts: set[int]  # Text items on the label layer
+    label_zoom: float  # Zoom the label texts are sized for
+
+    # VIEW
+    zoom: float
+    pan: Vector2  # Drawlist position of the world origin
+    fit_pending: bool  # Whether to fit the view to the map on the next update
+    drag_mouse_pos: Optional[Vector2]  # Mouse position during the last frame of panning, None if not panning
+
+    def __init__(self, tag: str, width: int, height: int, parent: int | str):
+        self.tag = tag
+        self.width = width
+        self.height = height
+        self.drawn = {"stubs": dict(), "paths": dict(), "nodes": dict()}
+        self.planet = None
+        self.label_texts = set()
+
+        self.zoom = 1
+        self.label_zoom = 1
+        self.pan = Vector2(0, 0)
+        self.fit_pending = True
+        self.drag_mouse_pos = None
+
+        dpg.add_drawlist(width, height, tag=self.tag, parent=parent)
+        dpg.draw_rectangle((0, 0), (width, height), color=TankMapRenderer.BACKGROUND_COL,
+                           fill=TankMapRenderer.BACKGROUND_COL, parent=self.tag)
+        self.world_nodes = dict()
+        for name in self.LAYERS:
+            layer = dpg.add_draw_layer(parent=self.tag)
+            self.world_nodes[name] = dpg.add_draw_node(parent=layer)
+        self._apply_view()
+
+    # UPDATE
+
+    def update_map(self, planet: Planet, cur_node: str, target_node: str, target_route: Route,
+                   depart_dir: Direction):
+        """
+        Updates the drawn map to the given data, replacing only the items of nodes and paths that changed.
+        """
+
+        new_signatures = {name: dict() for name in self.drawn.keys()}
+        for name, element_id, signature in TankMapRenderer.elements(planet):
+            new_signatures[name][element_id] = signature
+
+        for name, drawn_elements in self.drawn.items():
+            # REMOVED OR CHANGED
+            for element_id in list(drawn_elements.keys()):
+                signature, items = drawn_elements[element_id]
+                if new_signatures[name].get(element_id) != signature:
+                    self._delete_items(items)
+                    del drawn_elements[element_id]
+
+            # ADDED OR CHANGED
+            for element_id, signature in new_signatures[name].items():
+                if element_id not in drawn_elements:
+                    drawn_elements[element_id] = (signature, self._draw_element(planet, name, element_id))
+
+        self.planet = planet
+        self._draw_highlights(cur_node, target_node, target_route, depart_dir)
+
+        if self.fit_pending and planet.nodes:
+            self.fit_view()
+
+    def clear(self):
+        """
+        Removes all drawn items. The view is fitted to the next map again.
+        """
+
+        for name in self.LAYERS:
+            dpg.delete_item(self.world_nodes[name], children_only=True)
+        self.drawn = {name: dict() for name in self.drawn.keys()}
+        self.planet = None
+        self.label_texts.clear()
+        self.fit_pending = True
+
+    def _delete_items(self, items: list[int]):
+        for item in items:
+            dpg.delete_item(item)
+            self.label_texts.discard(item)
+
+    # VIEW
+
+    def handle_input(self):
+        """
+        Pans the view while the map is dragged with the left mouse button. Expected to be called once per frame.
+        """
+
+        if not dpg.is_mouse_button_down(dpg.mvMouseButton_Left):
+            self.drag_mouse_pos = None
+            return
+
+        mouse_pos = Vector2(dpg.get_mouse_pos(local=False))
+        if self.drag_mouse_pos is None:
+            if dpg.is_item_hovered(self.tag):
+                self.drag_mouse_pos = mouse_pos  # Start panning
+            return
+
+        if mouse_pos != self.drag_mouse_pos:
+            self.pan += mouse_pos - self.drag_mouse_pos
+            self.drag_mouse_pos = mouse_pos
+            self._apply_view()
+
+    def zoom_at_mouse(self, wheel_steps: float):
+        """
+        Zooms in or out by the given number of mouse wheel steps while keeping the point under the mouse in place.
+        """
+
+        if not dpg.is_item_hovered(self.tag):
+            return
+
+        anchor = Vector2(dpg.get_drawing_mouse_pos())
+        world_anchor = (anchor - self.pan) / self.zoom
+
+        self.zoom = min(max(self.zoom * self.ZOOM_STEP ** wheel_steps, self.MIN_ZOOM), self.MAX_ZOOM)
+        self.pan = anchor - world_anchor * self.zoom
+        self._apply_view()
+
+    def fit_view(self):
+        """
+        Zooms and pans the view so that the whole map is visible.
+        """
+
+        self.fit_pending = False
+        if self.planet is None or not self.planet.nodes:
+            return
+
+        positions = [TankMapRenderer.world_pos(node.coord) for node in self.planet.nodes.values()]
+        min_x = min(pos[0] for pos in positions) - self.FIT_MARGIN
+        min_y = min(pos[1] for pos in positions) - self.FIT_MARGIN
+        max_x = max(pos[0] for pos in positions) + self.FIT_MARGIN
+        max_y = max(pos[1] for pos in positions) + self.FIT_MARGIN
+
+        self.zoom = min(self.width / (max_x - min_x), self.height / (max_y - min_y), 1)
+        self.zoom = max(self.zoom, self.MIN_ZOOM)
+        center = Vector2(min_x + max_x, min_y + max_y) / 2
+        self.pan = Vector2(self.width, self.height) / 2 - center * self.zoom
+        self._apply_view()
+
+    def _apply_view(self):
+        transform = (dpg.create_translation_matrix([self.pan.x, self.pan.y])
+                     * dpg.create_scale_matrix([self.zoom, self.zoom]))
+        for world_node in self.world_nodes.values():
+            dpg.apply_transform(world_node, transform)
+
+        # LEVEL OF DETAIL (Level of the image that is closest to the zoom)
+        level = round(-math.log2(self.zoom))
+        show_labels = level <= TankMapRenderer.LABEL_MAX_LEVEL
+        dpg.configure_item(self.world_nodes["labels"], show=show_labels)
+        dpg.configure_item(self.world_nodes["stubs"], show=level <= TankMapRenderer.STUB_MAX_LEVEL)
+
+        # Hidden labels are only resized once they are shown again
+        if show_labels and self.label_zoom != self.zoom:
+            self.label_zoom = self.zoom
+            for item in self.label_texts:
+                dpg.configure_item(item, size=self.LABEL_SIZE * self.zoom)
+
+    # DRAWING
+
+    def _draw_element(self, planet: Planet, name: str, element_id: str) -> list[int]:
+        """
+        Draws the given element of the map and returns its draw items.
+        """
+
+        if name == "stubs":
+            return self._draw_unexplored_paths(self.world_nodes["stubs"], planet.nodes.get(element_id), None,
+                                               TankMapRenderer.GREY)
+        elif name == "paths":
+            return self._draw_path(self.world_nodes["paths"], planet, planet.paths.get(element_id),
+                                   TankMapRenderer.WHITE, with_labels=True)
+        else:
+            return self._draw_node(self.world_nodes["nodes"], element_id, planet.nodes.get(element_id),
+                                   TankMapRenderer.NODE_COL_GREEN, with_labels=True)
+
+    def _draw_highlights(self, cur_node: str, target_node: str, target_route: Route, depart_dir: Direction):
+        """
+        Redraws the departure direction and target route below the nodes and the current and target node on top
+        of them. Only a handful of items, so they are simply redrawn on every update.
+        """
+
+        planet = self.planet
+        route_layer = self.world_nodes["route"]
+        highlight_layer = self.world_nodes["highlights"]
+        dpg.delete_item(route_layer, children_only=True)
+        dpg.delete_item(highlight_layer, children_only=True)
+
+        # DEPARTURE DIRECTION
+        if cur_node in planet.nodes and depart_dir in planet.nodes[cur_node].available_paths:
+            self._draw_unexplored_paths(route_layer, planet.nodes[cur_node], depart_dir, TankMapRenderer.NODE_COL_RED)
+
+        # TARGET ROUTE
+        for path_id in target_route.path_id_list:
+            if path_id in planet.paths:
+                self._draw_path(route_layer, planet, planet.paths[path_id], TankMapRenderer.TARGET_PATH_COLOR,
+                                with_labels=False)
+
+        # NODES (Labels stay on the label layer)
+        if target_node in planet.nodes:
+            self._draw_node(highlight_layer, target_node, planet.nodes[target_node], TankMapRenderer.TARGET_COLOR,
+                            with_labels=False)
+        if cur_node in planet.nodes:
+            self._draw_node(highlight_layer, cur_node, planet.nodes[cur_node], TankMapRenderer.NODE_COL_RED,
+                            with_labels=False)
+
+    def _draw_unexplored_paths(self, parent: int, node: Node, only_dir: Optional[Direction],
+                               color: tuple) -> list[int]:
+        """
+        Draws the stubs of the unexplored paths of the given node.
+
+        :param only_dir: Only draw the stub in this direction if given
+        """
+
+        pos = TankMapRenderer.world_pos(node.coord)
+        items = list()
+
+        for direction in node.available_paths:
+            if only_dir is not None and direction != only_dir:
+                continue
+            if node.direction_to_path_id[direction] == "None":
+                path_pos = TankMapRenderer.offset_path_coord(pos, direction, is_unexplored=True)
+                items.append(dpg.draw_line(pos, path_pos, color=color, thickness=2, parent=parent))
+
+        return items
+
+    def _draw_path(self, parent: int, planet: Planet, path: Path, color: tuple, with_labels: bool) -> list[int]:
+        """
+        Draws the given path in the given color and, if specified, the texts of loop paths on the label layer.
+        """
+
+        node_pos_a = TankMapRenderer.world_pos(planet.nodes.get(path.node_a).coord)
+        path_pos_a = TankMapRenderer.offset_path_coord(node_pos_a, path.direction_a, is_unexplored=False)
+
+        node_pos_b = TankMapRenderer.world_pos(planet.nodes.get(path.node_b).coord)
+        path_pos_b = TankMapRenderer.offset_path_coord(node_pos_b, path.direction_b, is_unexplored=False)
+
+        items = [dpg.draw_polyline([node_pos_a, path_pos_a, path_pos_b, node_pos_b], color=color, thickness=2,
+                                   parent=parent)]
+
+        # Special case for blocked paths: Draw X in the center
+        if math.isinf(path.length):
+            mid_pos_x = (path_pos_a[0] + path_pos_b[0]) // 2
+            mid_pos_y = (path_pos_a[1] + path_pos_b[1]) // 2
+
+            offset = 10
+            items.append(dpg.draw_line((mid_pos_x - offset, mid_pos_y - offset),
+                                       (mid_pos_x + offset, mid_pos_y + offset),
+                                       color=TankMapRenderer.NODE_COL_RED, thickness=3, parent=parent))
+            items.append(dpg.draw_line((mid_pos_x - offset, mid_pos_y + offset),
+                                       (mid_pos_x + offset, mid_pos_y - offset),
+                                       color=TankMapRenderer.NODE_COL_RED, thickness=3, parent=parent))
+
+        # Special cases for non-inf loop-back paths that cannot be drawn well
+        elif path.node_a == path.node_b and with_labels:
+            if path.direction_a == path.direction_b:
+                abbr = path.direction_a.abbreviation()
+                pos = (path_pos_a[0] - 15, path_pos_a[1] - 5)
+                items.extend(self._draw_loop_path_text(pos, f"{abbr}->{abbr}"))
+
+            if path.direction_a.is_inverse_of(path.direction_b):
+                text = f"{path.direction_a.abbreviation()}->{path.direction_b.abbreviation()}"
+                pos = (path_pos_a[0] - 15, path_pos_a[1] - 5)
+                items.extend(self._draw_loop_path_text(pos, text))
+
+                text = f"{path.direction_b.abbreviation()}->{path.direction_a.abbreviation()}"
+                pos = (path_pos_b[0] - 15, path_pos_b[1] - 5)
+                items.extend(self._draw_loop_path_text(pos, text))
+
+        return items
+
+    def _draw_node(self, parent: int, node_id: str, node: Node, color: tuple, with_labels: bool) -> list[int]:
+        """
+        Draws the box of the given node with the given background color and, if specified,
+        its name and coordinates on the label layer.
+        """
+
+        pos = TankMapRenderer.world_pos(node.coord)
+        top_left = (pos[0] - 20, pos[1] - 20)
+        bottom_right = (top_left[0] + self.NODE_WIDTH, top_left[1] + self.NODE_HEIGHT)
+        items = [dpg.draw_rectangle(top_left, bottom_right, color=color, fill=color, parent=parent)]
+
+        if with_labels:
+            line_height = self.NODE_HEIGHT // 2 - 2
+            items.append(self._draw_label((top_left[0] + 5, top_left[1] + 3), self._limit_text(node_id.lower())))
+            items.append(self._draw_label((top_left[0] + 5, top_left[1] + 3 + line_height),
+                                          self._limit_text(node.coord.__str__())))
+
+        return items
+
+    def _draw_loop_path_text(self, pos: (int, int), text: str) -> list[int]:
+        """
+        Draws text indicating a looping path at the given position on the label layer.
+        """
+
+        parent = self.world_nodes["labels"]
+        width = len(text) * self.LABEL_SIZE // 2 + 2
+        return [
+            dpg.draw_rectangle(pos, (pos[0] + width, pos[1] + self.LABEL_SIZE), color=TankMapRenderer.BACKGROUND_COL,
+                               fill=TankMapRenderer.BACKGROUND_COL, parent=parent),
+            self._draw_label(pos, text)
+        ]
+
+    def _draw_label(self, pos: (int, int), text: str) -> int:
+        """
+        Draws the given text on the label layer at a size that scales with the zoom like the rest of the map.
+        """
+
+        item = dpg.draw_text(pos, text, color=TankMapRenderer.WHITE, size=self.LABEL_SIZE * self.label_zoom,
+                             parent=self.world_nodes["labels"])
+        self.label_texts.add(item)
+        return item
+
+    @staticmethod
+    def _limit_text(text: str) -> str:
+        if len(text) > TankMapDrawlist.LABEL_MAX_CHARS:
+            return f"{text[:TankMapDrawlist.LABEL_MAX_CHARS - 1]}-"
+        return text
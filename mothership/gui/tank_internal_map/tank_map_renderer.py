@@ -1,17 +1,54 @@
 import math
-
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
 import numpy as np
 import pygame
 from pygame import Vector2
+from planets.code.node import Node
+from planets.code.path import Path
 from planets.code.planet import Planet
 from planets.code.route import Route
 from util.direction import Direction
 
 
+@dataclass(frozen=True)
+class MapView:
+    """
+    Visible part of the tank's internal map: The world position (see TankMapRenderer.world_pos()) at the center
+    of the view, the level of detail and the size of the view in pixels.
+    """
+
+    center_x: float
+    center_y: float
+    level: int  # Level of detail, the map is scaled by 2^-level
+    width: int
+    height: int
+
+    @property
+    def scale(self) -> float:
+        return 2 ** -self.level
+
+    def origin(self) -> (int, int):
+        """
+        :return: Position of the top left corner of the view in the scaled map.
+        """
+
+        return (round(self.center_x * self.scale) - self.width // 2,
+                round(self.center_y * self.scale) - self.height // 2)
+
+
 class TankMapRenderer:
     """
     Class rendering the internal map of the tank robot. Unlike 'PlanetView', displaying the rendered image is not
     handled here but instead in the corresponding SubGUI.
+
+    One renderer is used per connected tank and only renders the visible part of the map (see MapView).
+    The base layer of nodes and paths is split into fixed-size tiles per level of detail, which are rendered on demand
+    and kept in a bounded cache, so memory does not grow with the size of the planet. Tiles are dropped from the cache
+    when the nodes and paths on them change. Zoomed out levels leave out details that would be unreadable anyway.
+    The highlights of the current node, target node and target route are drawn on top of the composed view.
+    A renderer, including its font and label cache, must only ever be used by a single thread (see TankMapWorker).
     """
 
     # COLORS
@@ -25,132 +62,450 @@ class TankMapRenderer:
 
     COORD_TO_PIXEL = 100
 
-    @staticmethod
-    def render_map_image(planet: Planet, cur_node: str, target_node: str,
-                         target_route: Route, depart_dir: Direction) -> np.ndarray:
+    # TILES
+    TILE_SIZE = 256
+    MAX_TILES = 64  # Least recently used tiles are dropped beyond this
+    MAX_DIRTY_RECTS = 32  # Above this many changed areas, dropping all tiles is cheaper
+    # Lines keep their pixel width when zoomed out, so tiles also depend on elements this close to them
+    PIXEL_MARGIN = 4
+
+    # LEVEL OF DETAIL
+    MAX_LEVEL = 5
+    LABEL_MAX_LEVEL = 0  # Node names, coordinates and loop path texts are left out above this level
+    STUB_MAX_LEVEL = 1  # Unexplored paths are left out above this level
+    NODE_SIZE = (50, 36)  # World size of nodes without labels
+
+    # FONT (Created on first use, looking up the system font is slow)
+    LABEL_CACHE_SIZE = 1024
+    font: Optional[pygame.font.Font]
+    # (text, limited to the node label width) -> rendered label, ordered from least to most recently used
+    labels: OrderedDict[tuple[str, bool], pygame.Surface]
+
+    planet: Optional[Planet]  # Planet the tiles were rendered from
+    # Layer name -> element id -> (signature, world area) of each element of the base layer, in drawing order.
+    # Tiles are rendered again whenever the signature of an element on them changes.
+    drawn: dict[str, dict[str, tuple[tuple, pygame.Rect]]]
+    # Spatial index of the elements: (column, row) of a tile on the most detailed level -> (layer name, element id)
+    # of all elements whose area overlaps the tile. Rendering a tile only looks at the elements near it.
+    cells: dict[tuple[int, int], set[tuple[str, str]]]
+    draw_order: dict[tuple[str, str], int]  # (layer name, element id) -> position in drawing order
+    tiles: OrderedDict[tuple[int, int, int], pygame.Surface]  # (level, column, row) -> tile, least recent first
+    view_surface: Optional[pygame.Surface]
+
+    def __init__(self):
+        self.planet = None
+        self.drawn = {"stubs": dict(), "paths": dict(), "nodes": dict()}
+        self.cells = dict()
+        self.draw_order = dict()
+        self.tiles = OrderedDict()
+        self.view_surface = None
+        self.font = None
+        self.labels = OrderedDict()
+
+    def render_map_image(self, planet: Planet, cur_node: str, target_node: str,
+                         target_route: Route, depart_dir: Direction, view: MapView) -> np.ndarray:
         """
-        Renders an image of the given data. The rendered image can have different scaling based
-        on the coordinates of the planet nodes.
+        Renders an image of the given view of the given data.
         Assumes pygame is initialized.
 
         :return: np.ndarray of the rendered image.
         """
 
-        # FONT
-        pygame.font.init()
-        font = pygame.font.SysFont(None, 18)
+        # BASE LAYER
+        self._update_elements(planet)
+        self.planet = planet
 
-        # SURFACE
-        # Find min and max coordinates among all nodes
-        min_x, min_y = float('inf'), float('inf')
-        max_x, max_y = float('-inf'), float('-inf')
-        for node in planet.nodes.values():
-            min_x = min(min_x, node.coord.x)
-            min_y = min(min_y, node.coord.y)
-            max_x = max(max_x, node.coord.x)
-            max_y = max(max_y, node.coord.y)
+        if self.view_surface is None or self.view_surface.get_size() != (view.width, view.height):
+            self.view_surface = pygame.Surface((view.width, view.height))
+        self._draw_tiles(self.view_surface, view)
 
-        # Calculate width and height needed for the image, including a margin on either side
-        min_size = 400
-        width = max(min_size, int((max_x - min_x) * TankMapRenderer.COORD_TO_PIXEL) + 200)
-        height = max(min_size, int((max_y - min_y) * TankMapRenderer.COORD_TO_PIXEL) + 200)
+        # HIGHLIGHT LAYER
+        self._draw_highlights(self.view_surface, view, cur_node, target_node, target_route, depart_dir)
 
-        image_surface: pygame.Surface = pygame.Surface((width, height))
-        image_surface.fill(TankMapRenderer.BACKGROUND_COL)
+        return TankMapRenderer._surface_to_numpy(self.view_surface)
 
-        # UNEXPLORED NODE PATHS (Separate from both paths and node loops for rendering order)
-        for node_id, node in planet.nodes.items():
-            pos = TankMapRenderer._position_adjusted(node.coord, min_x, min_y, height)
+    @staticmethod
+    def fit_view(planet: Planet, width: int, height: int) -> MapView:
+        """
+        :return: The most detailed view of the given size that shows all nodes of the given planet.
+        """
+
+        if not planet.nodes:
+            return MapView(0, 0, 0, width, height)
 
-            for direction in node.available_paths:
-                if node.direction_to_path_id[direction] == "None":
-                    path_pos = TankMapRenderer._offset_path_coord(pos, direction, is_unexplored=True)
+        positions = [TankMapRenderer.world_pos(node.coord) for node in planet.nodes.values()]
+        min_x = min(pos[0] for pos in positions) - 100
+        min_y = min(pos[1] for pos in positions) - 100
+        max_x = max(pos[0] for pos in positions) + 100
+        max_y = max(pos[1] for pos in positions) + 100
+
+        level = 0
+        while level < TankMapRenderer.MAX_LEVEL and ((max_x - min_x) * 2 ** -level > width
+                                                     or (max_y - min_y) * 2 ** -level > height):
+            level += 1
+        return MapView((min_x + max_x) / 2, (min_y + max_y) / 2, level, width, height)
+
+    # ELEMENTS
+
+    def _update_elements(self, planet: Planet):
+        """
+        Finds the nodes and paths that changed since the last update and drops the tiles they are on.
+        """
 
-                    color = TankMapRenderer.GREY
-                    if node_id == cur_node and direction == depart_dir:
-                        color = TankMapRenderer.NODE_COL_RED
-                    pygame.draw.line(image_surface, color, pos, path_pos, width=2)
+        new_signatures = {name: dict() for name in self.drawn.keys()}
+        for name, element_id, signature in self.elements(planet):
+            new_signatures[name][element_id] = signature
+
+        dirty_areas: list[pygame.Rect] = list()
+        for name, drawn_elements in self.drawn.items():
+            for element_id in list(drawn_elements.keys()):
+                signature, area = drawn_elements[element_id]
+                if new_signatures[name].get(element_id) != signature:
+                    dirty_areas.append(area)  # Removed or changed -> old area
+                    del drawn_elements[element_id]
+                    for cell in self._cells_of(area):
+                        self.cells[cell].discard((name, element_id))
+
+            for element_id, signature in new_signatures[name].items():
+                if element_id not in drawn_elements:
+                    area = self._element_area(planet, name, element_id)  # Added or changed -> new area
+                    drawn_elements[element_id] = (signature, area)
+                    dirty_areas.append(area)
+                    for cell in self._cells_of(area):
+                        self.cells.setdefault(cell, set()).add((name, element_id))
+
+            # Keep the drawing order of the planet
+            self.drawn[name] = {element_id: drawn_elements[element_id] for element_id in new_signatures[name]}
+
+        if dirty_areas:
+            self.draw_order = {(name, element_id): position for position, (name, element_id)
+                               in enumerate((name, element_id) for name, drawn_elements in self.drawn.items()
+                                            for element_id in drawn_elements.keys())}
+
+        if len(dirty_areas) > self.MAX_DIRTY_RECTS:
+            self.tiles.clear()
+            return
+
+        for key in [key for key in self.tiles.keys() if self._tile_area(*key).collidelist(dirty_areas) != -1]:
+            del self.tiles[key]
+
+    @staticmethod
+    def elements(planet: Planet):
+        """
+        Yields (layer name, element id, signature) of all elements of the base layer in drawing order:
+        Unexplored node paths first, then paths and then nodes on top.
+        The signature contains everything that determines what an element looks like.
+        """
+
+        node_signatures = {node_id: TankMapRenderer._node_signature(node) for node_id, node in planet.nodes.items()}
+
+        # UNEXPLORED NODE PATHS (Separate from both paths and node loops for rendering order)
+        for node_id, signature in node_signatures.items():
+            yield "stubs", node_id, signature
 
         # PATHS
         for path_id, path in planet.paths.items():
-            node_a = planet.nodes.get(path.node_a)
-            node_pos_a = TankMapRenderer._position_adjusted(node_a.coord, min_x, min_y, height)
-            path_pos_a = TankMapRenderer._offset_path_coord(node_pos_a, path.direction_a, is_unexplored=False)
-
-            node_b = planet.nodes.get(path.node_b)
-            node_pos_b = TankMapRenderer._position_adjusted(node_b.coord, min_x, min_y, height)
-            path_pos_b = TankMapRenderer._offset_path_coord(node_pos_b, path.direction_b, is_unexplored=False)
-
-            color = TankMapRenderer.WHITE if path_id not in target_route.path_id_list \
-                else TankMapRenderer.TARGET_PATH_COLOR
-            pygame.draw.line(image_surface, color, node_pos_a, path_pos_a, width=2)
-            pygame.draw.line(image_surface, color, path_pos_a, path_pos_b, width=2)
-            pygame.draw.line(image_surface, color, path_pos_b, node_pos_b, width=2)
-
-            # Special case for blocked paths: Draw X in the center
-            if math.isinf(path.length):
-                # Calculate midpoint
-                mid_pos_x = (path_pos_a[0] + path_pos_b[0]) // 2
-                mid_pos_y = (path_pos_a[1] + path_pos_b[1]) // 2
-
-                # Draw X
-                offset = 10
-                pygame.draw.line(image_surface, TankMapRenderer.NODE_COL_RED, (mid_pos_x - offset, mid_pos_y - offset),
-                                 (mid_pos_x + offset, mid_pos_y + offset), width=3)
-                pygame.draw.line(image_surface, TankMapRenderer.NODE_COL_RED, (mid_pos_x - offset, mid_pos_y + offset),
-                                 (mid_pos_x + offset, mid_pos_y - offset), width=3)
-
-            # Special cases for non-inf loop-back paths that cannot be drawn well
-            elif path.node_a == path.node_b:
-                if path.direction_a == path.direction_b:
-                    abbr = path.direction_a.abbreviation()
-                    pos = (path_pos_a[0] - 15, path_pos_a[1] - 5)
-                    TankMapRenderer._draw_loop_path_text(pos, f"{abbr}->{abbr}", font, image_surface)
-
-                if path.direction_a.is_inverse_of(path.direction_b):
-                    text = f"{path.direction_a.abbreviation()}->{path.direction_b.abbreviation()}"
-                    pos = (path_pos_a[0] - 15, path_pos_a[1] - 5)
-                    TankMapRenderer._draw_loop_path_text(pos, text, font, image_surface)
-
-                    text = f"{path.direction_b.abbreviation()}->{path.direction_a.abbreviation()}"
-                    pos = (path_pos_b[0] - 15, path_pos_b[1] - 5)
-                    TankMapRenderer._draw_loop_path_text(pos, text, font, image_surface)
+            yield "paths", path_id, (path.node_a, path.node_b, path.direction_a, path.direction_b, path.length,
+                                     node_signatures[path.node_a][:2], node_signatures[path.node_b][:2])
+
+        # NODES
+        for node_id, signature in node_signatures.items():
+            yield "nodes", node_id, signature[:2]
+
+    @staticmethod
+    def _node_signature(node: Node) -> tuple:
+        return (node.coord.x, node.coord.y, tuple(sorted(d.value for d in node.available_paths)),
+                tuple((d.value, path_id) for d, path_id in node.direction_to_path_id.items()))
+
+    @staticmethod
+    def _element_area(planet: Planet, name: str, element_id: str) -> pygame.Rect:
+        """
+        :return: World area that the given element of the base layer covers on the most detailed level.
+        """
+
+        if name == "stubs":
+            node = planet.nodes.get(element_id)
+            pos = TankMapRenderer.world_pos(node.coord)
+            points = [pos] + [TankMapRenderer.offset_path_coord(pos, direction, is_unexplored=True)
+                              for direction in node.available_paths]
+            return TankMapRenderer._points_area(points, margin=2)
+
+        elif name == "paths":
+            path = planet.paths.get(element_id)
+            node_pos_a = TankMapRenderer.world_pos(planet.nodes.get(path.node_a).coord)
+            node_pos_b = TankMapRenderer.world_pos(planet.nodes.get(path.node_b).coord)
+            path_pos_a = TankMapRenderer.offset_path_coord(node_pos_a, path.direction_a, is_unexplored=False)
+            path_pos_b = TankMapRenderer.offset_path_coord(node_pos_b, path.direction_b, is_unexplored=False)
+            area = TankMapRenderer._points_area([node_pos_a, path_pos_a, path_pos_b, node_pos_b], margin=12)
+
+            if path.node_a == path.node_b:  # Loop path texts
+                for pos in (path_pos_a, path_pos_b):
+                    area.union_ip(pygame.Rect(pos[0] - 15, pos[1] - 5, 60, 20))
+            return area
+
+        else:
+            pos = TankMapRenderer.world_pos(planet.nodes.get(element_id).coord)
+            return pygame.Rect(pos[0] - 20, pos[1] - 20, 70, 60)
+
+    @staticmethod
+    def _points_area(points: list[(float, float)], margin: int) -> pygame.Rect:
+        min_x = math.floor(min(point[0] for point in points)) - margin
+        min_y = math.floor(min(point[1] for point in points)) - margin
+        max_x = math.ceil(max(point[0] for point in points)) + margin
+        max_y = math.ceil(max(point[1] for point in points)) + margin
+        return pygame.Rect(min_x, min_y, max_x - min_x, max_y - min_y)
+
+    # TILES
+
+    def _draw_tiles(self, surface: pygame.Surface, view: MapView):
+        """
+        Draws the tiles covering the given view onto the given surface, rendering the ones that are not cached.
+        """
+
+        origin_x, origin_y = view.origin()
+        tile_size = self.TILE_SIZE
+        for row in range(origin_y // tile_size, (origin_y + view.height - 1) // tile_size + 1):
+            for column in range(origin_x // tile_size, (origin_x + view.width - 1) // tile_size + 1):
+                surface.blit(self._get_tile(view.level, column, row),
+                             (column * tile_size - origin_x, row * tile_size - origin_y))
+
+    def _get_tile(self, level: int, column: int, row: int) -> pygame.Surface:
+        key = (level, column, row)
+        tile = self.tiles.get(key)
+        if tile is not None:
+            self.tiles.move_to_end(key)
+            return tile
+
+        # RENDER
+        tile = pygame.Surface((self.TILE_SIZE, self.TILE_SIZE))
+        tile.fill(TankMapRenderer.BACKGROUND_COL)
+        tile_area = self._tile_area(level, column, row)
+        offset = (column * self.TILE_SIZE, row * self.TILE_SIZE)
+
+        nearby: set[tuple[str, str]] = set()
+        for cell in self._cells_of(tile_area):
+            nearby.update(self.cells.get(cell, ()))
+
+        for name, element_id in sorted(nearby, key=self.draw_order.__getitem__):
+            if name == "stubs" and level > self.STUB_MAX_LEVEL:
+                continue
+            if self.drawn[name][element_id][1].colliderect(tile_area):
+                self._draw_element(tile, name, element_id, level, offset)
+
+        self.tiles[key] = tile
+        if len(self.tiles) > self.MAX_TILES:
+            self.tiles.popitem(last=False)
+        return tile
+
+    def _tile_area(self, level: int, column: int, row: int) -> pygame.Rect:
+        """
+        :return: World area of the elements that the given tile depends on.
+        """
+
+        world_size = self.TILE_SIZE * 2 ** level
+        margin = self.PIXEL_MARGIN * 2 ** level
+        return pygame.Rect(column * world_size - margin, row * world_size - margin,
+                           world_size + 2 * margin, world_size + 2 * margin)
+
+    def _cells_of(self, area: pygame.Rect):
+        """
+        Yields the (column, row) of all tiles on the most detailed level that the given world area overlaps.
+        """
+
+        for row in range(area.top // self.TILE_SIZE, (area.bottom - 1) // self.TILE_SIZE + 1):
+            for column in range(area.left // self.TILE_SIZE, (area.right - 1) // self.TILE_SIZE + 1):
+                yield column, row
+
+    # DRAWING
+
+    def _draw_element(self, surface: pygame.Surface, name: str, element_id: str, level: int,
+                      offset: (int, int)) -> pygame.Rect:
+        """
+        Draws the given element of the base layer and returns the area it covers.
+        """
+
+        planet = self.planet
+        if name == "stubs":
+            return self._draw_unexplored_paths(surface, planet.nodes.get(element_id), None, None, level, offset)
+        elif name == "paths":
+            return self._draw_path(surface, planet, planet.paths.get(element_id), TankMapRenderer.WHITE,
+                                   level, offset)
+        else:
+            return self._draw_node(surface, element_id, planet.nodes.get(element_id),
+                                   TankMapRenderer.NODE_COL_GREEN, level, offset)
+
+    def _draw_highlights(self, surface: pygame.Surface, view: MapView, cur_node: str, target_node: str,
+                         target_route: Route, depart_dir: Direction):
+        """
+        Draws the current node, target node, target route and departure direction on top of the given view.
+        Nodes that are covered by the highlighted paths are drawn again so that they stay on top.
+        """
+
+        planet = self.planet
+        level, offset = view.level, view.origin()
+        highlighted_areas: list[pygame.Rect] = list()  # World areas
+
+        # DEPARTURE DIRECTION
+        if cur_node in planet.nodes and depart_dir in planet.nodes[cur_node].available_paths:
+            self._draw_unexplored_paths(surface, planet.nodes[cur_node], depart_dir, TankMapRenderer.NODE_COL_RED,
+                                        level, offset)
+            highlighted_areas.append(self.drawn["stubs"][cur_node][1])
+
+        # TARGET ROUTE
+        for path_id in target_route.path_id_list:
+            if path_id in planet.paths:
+                self._draw_path(surface, planet, planet.paths[path_id], TankMapRenderer.TARGET_PATH_COLOR,
+                                level, offset)
+                highlighted_areas.append(self.drawn["paths"][path_id][1])
 
         # NODES
-        for node_id, node in planet.nodes.items():
-            pos = TankMapRenderer._position_adjusted(node.coord, min_x, min_y, height)
+        if highlighted_areas:
+            for node_id, (_, area) in self.drawn["nodes"].items():
+                if node_id not in (cur_node, target_node) and area.collidelist(highlighted_areas) != -1:
+                    self._draw_node(surface, node_id, planet.nodes[node_id], TankMapRenderer.NODE_COL_GREEN,
+                                    level, offset)
+
+        if target_node in planet.nodes:
+            self._draw_node(surface, target_node, planet.nodes[target_node], TankMapRenderer.TARGET_COLOR,
+                            level, offset)
+        if cur_node in planet.nodes:
+            self._draw_node(surface, cur_node, planet.nodes[cur_node], TankMapRenderer.NODE_COL_RED, level, offset)
+
+    def _draw_unexplored_paths(self, surface: pygame.Surface, node: Node, only_dir: Optional[Direction],
+                               color: Optional[tuple], level: int, offset: (int, int)) -> pygame.Rect:
+        """
+        Draws the stubs of the unexplored paths of the given node and returns the area they cover.
 
-            # Text surfaces
-            node_text = TankMapRenderer.limit_text_to_width(node_id.lower(),
-                                                            min_width=32, max_width=43, font=font)
-            name_surface = font.render(node_text, True, TankMapRenderer.WHITE)
+        :param only_dir: Only draw the stub in this direction (in the given color) if given
+        """
+
+        world_pos = TankMapRenderer.world_pos(node.coord)
+        pos = TankMapRenderer._to_surface(world_pos, level, offset)
+        area = pygame.Rect(pos, (0, 0))
+
+        for direction in node.available_paths:
+            if only_dir is not None and direction != only_dir:
+                continue
+            if node.direction_to_path_id[direction] == "None":
+                path_pos = TankMapRenderer._to_surface(
+                    TankMapRenderer.offset_path_coord(world_pos, direction, is_unexplored=True), level, offset)
+                area.union_ip(pygame.draw.line(surface, color or TankMapRenderer.GREY, pos, path_pos, width=2))
+
+        return area
+
+    def _draw_path(self, surface: pygame.Surface, planet: Planet, path: Path, color: tuple, level: int,
+                   offset: (int, int)) -> pygame.Rect:
+        """
+        Draws the given path in the given color and returns the area it covers.
+        """
+
+        world_pos_a = TankMapRenderer.world_pos(planet.nodes.get(path.node_a).coord)
+        node_pos_a = TankMapRenderer._to_surface(world_pos_a, level, offset)
+        path_pos_a = TankMapRenderer._to_surface(
+            TankMapRenderer.offset_path_coord(world_pos_a, path.direction_a, is_unexplored=False), level, offset)
+
+        world_pos_b = TankMapRenderer.world_pos(planet.nodes.get(path.node_b).coord)
+        node_pos_b = TankMapRenderer._to_surface(world_pos_b, level, offset)
+        path_pos_b = TankMapRenderer._to_surface(
+            TankMapRenderer.offset_path_coord(world_pos_b, path.direction_b, is_unexplored=False), level, offset)
+
+        area = pygame.draw.line(surface, color, node_pos_a, path_pos_a, width=2)
+        area.union_ip(pygame.draw.line(surface, color, path_pos_a, path_pos_b, width=2))
+        area.union_ip(pygame.draw.line(surface, color, path_pos_b, node_pos_b, width=2))
+
+        # Special case for blocked paths: Draw X in the center
+        if math.isinf(path.length):
+            # Calculate midpoint
+            mid_pos_x = (path_pos_a[0] + path_pos_b[0]) // 2
+            mid_pos_y = (path_pos_a[1] + path_pos_b[1]) // 2
+
+            # Draw X
+            x_offset = max(3, 10 >> level)
+            area.union_ip(pygame.draw.line(surface, TankMapRenderer.NODE_COL_RED,
+                                           (mid_pos_x - x_offset, mid_pos_y - x_offset),
+                                           (mid_pos_x + x_offset, mid_pos_y + x_offset), width=3))
+            area.union_ip(pygame.draw.line(surface, TankMapRenderer.NODE_COL_RED,
+                                           (mid_pos_x - x_offset, mid_pos_y + x_offset),
+                                           (mid_pos_x + x_offset, mid_pos_y - x_offset), width=3))
+
+        # Special cases for non-inf loop-back paths that cannot be drawn well
+        elif path.node_a == path.node_b and level <= self.LABEL_MAX_LEVEL:
+            if path.direction_a == path.direction_b:
+                abbr = path.direction_a.abbreviation()
+                pos = (path_pos_a[0] - 15, path_pos_a[1] - 5)
+                area.union_ip(self._draw_loop_path_text(pos, f"{abbr}->{abbr}", surface))
+
+            if path.direction_a.is_inverse_of(path.direction_b):
+                text = f"{path.direction_a.abbreviation()}->{path.direction_b.abbreviation()}"
+                pos = (path_pos_a[0] - 15, path_pos_a[1] - 5)
+                area.union_ip(self._draw_loop_path_text(pos, text, surface))
+
+                text = f"{path.direction_b.abbreviation()}->{path.direction_a.abbreviation()}"
+                pos = (path_pos_b[0] - 15, path_pos_b[1] - 5)
+                area.union_ip(self._draw_loop_path_text(pos, text, surface))
+
+        return area
+
+    def _draw_node(self, surface: pygame.Surface, node_id: str, node: Node, color: tuple, level: int,
+                   offset: (int, int)) -> pygame.Rect:
+        """
+        Draws the given node with the given background color and returns the area it covers.
+        """
+
+        world_pos = TankMapRenderer.world_pos(node.coord)
+        background_top_left = TankMapRenderer._to_surface((world_pos[0] - 20, world_pos[1] - 20), level, offset)
 
-            coord_text = TankMapRenderer.limit_text_to_width(node.coord.__str__(),
-                                                             min_width=32, max_width=43, font=font)
-            coord_surface = font.render(coord_text, True, TankMapRenderer.WHITE)
+        # Zoomed out: Only the bounding box
+        if level > self.LABEL_MAX_LEVEL:
+            background_width = max(3, self.NODE_SIZE[0] >> level)
+            background_height = max(3, self.NODE_SIZE[1] >> level)
+            return pygame.draw.rect(surface, color, (*background_top_left, background_width, background_height))
 
-            # Bounding box
-            name_size = name_surface.get_size()
-            coord_size = coord_surface.get_size()
-            background_width = max(name_size[0], coord_size[0]) + 10
-            background_height = name_size[1] + coord_size[1] + 10
+        # Text surfaces
+        name_surface = self._label(node_id.lower(), limit_width=True)
+        coord_surface = self._label(node.coord.__str__(), limit_width=True)
 
-            background_top_left = (pos[0] - 20, pos[1] - 20)
+        # Bounding box
+        name_size = name_surface.get_size()
+        coord_size = coord_surface.get_size()
+        background_width = max(name_size[0], coord_size[0]) + 10
+        background_height = name_size[1] + coord_size[1] + 10
 
-            color = TankMapRenderer.NODE_COL_GREEN
-            if node_id == cur_node:
-                color = TankMapRenderer.NODE_COL_RED
-            elif node_id == target_node:
-                color = TankMapRenderer.TARGET_COLOR
+        area = pygame.draw.rect(surface, color, (*background_top_left, background_width, background_height))
 
-            pygame.draw.rect(image_surface, color,
-                             (*background_top_left, background_width, background_height))
+        # Blit text surfaces on top of the bounding box
+        surface.blit(name_surface, (background_top_left[0] + 5, background_top_left[1] + 5))
+        surface.blit(coord_surface, (background_top_left[0] + 5, background_top_left[1] + name_size[1] + 5))
+        return area
 
-            # Blit text surfaces on top of the bounding box
-            image_surface.blit(name_surface, (background_top_left[0] + 5, background_top_left[1] + 5))
-            image_surface.blit(coord_surface, (background_top_left[0] + 5, background_top_left[1] + name_size[1] + 5))
+    def _get_font(self) -> pygame.font.Font:
+        if self.font is None:
+            pygame.font.init()
+            self.font = pygame.font.SysFont(None, 18)
+        return self.font
 
-        return TankMapRenderer._surface_to_numpy(image_surface)
+    def _label(self, text: str, limit_width: bool) -> pygame.Surface:
+        """
+        Returns the rendered label of the given text, from the label cache if possible.
+
+        :param limit_width: Whether to limit the text to the width of node labels (see limit_text_to_width())
+        """
+
+        key = (text, limit_width)
+        label = self.labels.get(key)
+        if label is not None:
+            self.labels.move_to_end(key)
+            return label
+
+        font = self._get_font()
+        if limit_width:
+            text = TankMapRenderer.limit_text_to_width(text, min_width=32, max_width=43, font=font)
+        label = font.render(text, True, TankMapRenderer.WHITE)
+
+        self.labels[key] = label
+        if len(self.labels) > self.LABEL_CACHE_SIZE:
+            self.labels.popitem(last=False)
+        return label
 
     @staticmethod
     def limit_text_to_width(text: str, min_width: int, max_width: int, font: pygame.font) -> str:
@@ -171,19 +526,18 @@ class TankMapRenderer:
 
         return text
 
-    @staticmethod
-    def _draw_loop_path_text(pos: (int, int), text: str, font: pygame.font, image_surface: pygame.surface):
+    def _draw_loop_path_text(self, pos: (int, int), text: str, image_surface: pygame.surface) -> pygame.Rect:
         """
-        Draws text indicating a looping path at the given position with the given font on the given image surface.
+        Draws text indicating a looping path at the given position on the given image surface.
         """
 
-        text_surface = font.render(text, True, TankMapRenderer.WHITE)
+        text_surface = self._label(text, limit_width=False)
         pygame.draw.rect(image_surface, TankMapRenderer.BACKGROUND_COL,
                          (*pos, *text_surface.get_size()))
-        image_surface.blit(text_surface, pos)
+        return image_surface.blit(text_surface, pos)
 
     @staticmethod
-    def _offset_path_coord(position: (int, int), direction: Direction, is_unexplored: bool) -> (int, int):
+    def offset_path_coord(position: (int, int), direction: Direction, is_unexplored: bool) -> (int, int):
         """
         Offsets the coordinate of a path's joint position (from where it attaches to another path's joint)
         based on which direction it is in. Additionally, it considers whether the path is still unexplored to
@@ -204,17 +558,23 @@ class TankMapRenderer:
             return -1, -1
 
     @staticmethod
-    def _position_adjusted(coord: Vector2, min_x: int, min_y: int, height: int) -> (int, int):
+    def world_pos(coord: Vector2) -> (float, float):
         """
-        Adjusts the given node coordinates based on the given minimum x and y coordinates of nodes on the planet
-        as well as the given image height.
-        This way all nodes are positioned relative to the lowest and furthest left node and none exit the screen space.
+        Position of the given node coordinates on the most detailed level of the map, with y pointing down
+        like on screen.
         """
 
-        node_x = int((coord.x - min_x) * TankMapRenderer.COORD_TO_PIXEL) + 100
-        node_y = height - (int((coord.y - min_y) * TankMapRenderer.COORD_TO_PIXEL) + 100)
+        return coord.x * TankMapRenderer.COORD_TO_PIXEL, -coord.y * TankMapRenderer.COORD_TO_PIXEL
+
+    @staticmethod
+    def _to_surface(world_pos: (float, float), level: int, offset: (int, int)) -> (int, int):
+        """
+        Converts the given world position to the given level of detail and then to the surface whose top left
+        corner is at the given offset on that level.
+        """
 
-        return node_x, node_y
+        scale = 2 ** -level
+        return round(world_pos[0] * scale) - offset[0], round(world_pos[1] * scale) - offset[1]
 
     @staticmethod
     def _surface_to_numpy(surface: pygame.Surface) -> np.ndarray:
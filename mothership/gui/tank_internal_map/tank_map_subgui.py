@@ -1,72 +1,227 @@
 from __future__ import annotations
+from typing import Optional
 import dearpygui.dearpygui as dpg
 import numpy as np
 from mothership.gui import theme
 from mothership.gui.sub_gui import SubGUI
-from mothership.update_event import UpdateEvent
+from mothership.gui.tank_internal_map.tank_map_drawlist import TankMapDrawlist
+from mothership.gui.tank_internal_map.tank_map_renderer import TankMapRenderer, MapView
+from mothership.gui.tank_internal_map.tank_map_worker import TankMapWorker
+from mothership.update_event import UpdateEvent, TankPlanetUpdate
 
 
 class TankMapSubGUI(SubGUI):
     """
     SubGUI responsible for displaying the tank's internal map.
+    The map is either drawn as vector items (TankMapDrawlist, default) or displayed as an image of the visible
+    part of the map, rendered by TankMapRenderer in the background (TankMapWorker).
+    Both can be panned by dragging with the left mouse button and zoomed with the mouse wheel.
     """
 
-    # Use a frame buffer to avoid dpg's weird deletion order errors
-    # -> Add new frame on top and delete last frame, that way, deletion always has enough iterations to conclude
-    MAX_FRAMES = 3
-    frame_tags: list[str]
-    cur_frame_index: int
+    MAP_WIDTH = 610
+    MAP_HEIGHT = 570
+
+    vector_mode: bool  # Whether the map is displayed with the drawlist instead of as an image
+    drawlist: TankMapDrawlist
+    tank_planet_update: Optional[TankPlanetUpdate]  # Latest internal map of the connected tank
+
+    # IMAGE
+    worker: Optional[TankMapWorker]  # Only started once the map is first displayed as an image
+    image_view: MapView
+    image_fit_pending: bool  # Whether to fit the image view to the map on the next update
+    image_drag_mouse_pos: Optional[tuple[float, float]]  # Mouse position during the last frame of panning
+
+    # TEXTURE
+    # One persistent raw texture of the view size that is updated in place from a reusable buffer
+    TEXTURE_TAG = "tank_map_texture"
+    texture_buffer: Optional[np.ndarray]  # Contiguous float32 RGBA buffer (height, width, 4) backing the texture
 
     def __init__(self, tag: str, gui_core):
         super().__init__(tag, gui_core)
-        self.frame_tags = list()
-        self.cur_frame_index = 0
+        self.vector_mode = True
+        self.tank_planet_update = None
+
+        self.image_view = MapView(0, 0, 0, self.MAP_WIDTH, self.MAP_HEIGHT)
+        self.image_fit_pending = True
+        self.image_drag_mouse_pos = None
+        self.worker = None
+
+        self.texture_buffer = None
 
         # WINDOW
         with dpg.window(label="Tank internal map", width=630, height=650, no_close=True, tag=self.tag, no_move=True,
                         pos=[430, 10], horizontal_scrollbar=True) as window_id:
             theme.apply_window_theme(window_id)
-            with dpg.group(tag="image_container"):
+
+            with dpg.group(horizontal=True):
+                dpg.add_checkbox(label="Vector map", default_value=self.vector_mode,
+                                 callback=self._vector_mode_callback, tag="tank_map_vector_checkbox")
+                button_id = dpg.add_button(label="Fit view", callback=self._fit_view_callback,
+                                           tag="tank_map_fit_button")
+                theme.apply_button_theme(button_id)
+
+            self.drawlist = TankMapDrawlist("tank_map_drawlist", self.MAP_WIDTH, self.MAP_HEIGHT, parent=window_id)
+            with dpg.group(tag="image_container", show=not self.vector_mode):
                 pass  # Placeholder for the image container
 
+        # Zooming the map (there is no way to poll the mouse wheel)
+        with dpg.handler_registry():
+            dpg.add_mouse_wheel_handler(callback=self._mouse_wheel_callback)
+
     def update(self) -> list[UpdateEvent]:
+        if self.vector_mode:
+            self.drawlist.handle_input()
+        else:
+            self._handle_image_input()
+
+            # Display the image once it is rendered
+            image = self.worker.take_image() if self.worker is not None else None
+            if image is not None:
+                self.update_image(image)
+
         return list()
 
-    @staticmethod
-    def remove_image():
+    def display_map(self, event: TankPlanetUpdate):
         """
-        Removes the currently displayed image.
+        Displays the internal map of the given update.
         """
 
+        self.tank_planet_update = event
+        if self.vector_mode:
+            self.drawlist.update_map(event.planet, event.cur_node, event.target_node, event.target_route,
+                                     event.depart_dir)
+            return
+
+        if self.worker is None:
+            self.worker = TankMapWorker(self.image_view)
+        if self.image_fit_pending and event.planet.nodes:
+            self._fit_image_view()
+        self.worker.submit(event)
+
+    def remove_map(self):
+        """
+        Removes the currently displayed map. The next map starts from scratch.
+        """
+
+        self.tank_planet_update = None
+        if self.worker is not None:
+            self.worker.reset()
+        self.image_fit_pending = True
+        self.drawlist.clear()
         if dpg.does_item_exist("image"):
             dpg.delete_item("image")
 
     def update_image(self, image: np.ndarray):
         """
-        Replaces the displayed image with the given image array.
+        Replaces the displayed image with the given image array (uint8 RGBA or normalized float32 RGBA).
+        The image always has the size of the image view (see TankMapWorker).
         """
 
-        texture_tag = f"frame_{self.cur_frame_index}"
+        height, width = image.shape[:2]
+        if self.texture_buffer is None:
+            self.allocate_texture(width, height)
 
-        # Normalize image format
+        # Update the texture in place (with normalized image format)
         if image.dtype != np.float32:
-            image = image.astype(np.float32) / 255.0
+            np.multiply(image, np.float32(1 / 255), out=self.texture_buffer)
+        else:
+            self.texture_buffer[...] = image
+        dpg.set_value(self.TEXTURE_TAG, self.texture_buffer)
 
-        # Delete the oldest frame if necessary
-        if len(self.frame_tags) >= self.MAX_FRAMES:
-            oldest_tag = self.frame_tags.pop(0)
-            dpg.delete_item(oldest_tag)
+        if not dpg.does_item_exist("image"):
+            dpg.add_image(self.TEXTURE_TAG, parent="image_container", tag="image", width=width, height=height)
 
-        # Add new texture to the texture registry
+    def allocate_texture(self, width: int, height: int):
+        """
+        Creates the texture for images of the given size.
+        """
+
+        self.texture_buffer = np.zeros((height, width, 4), dtype=np.float32)
+
+        # Raw textures use the given buffer directly instead of copying it
         with dpg.texture_registry(show=False):
-            height, width = image.shape[:2]
-            dpg.add_static_texture(width, height, image.flatten(), tag=texture_tag)
+            dpg.add_raw_texture(width, height, self.texture_buffer, format=dpg.mvFormat_Float_rgba,
+                                tag=self.TEXTURE_TAG)
 
-        # Update the image display
-        if dpg.does_item_exist("image"):
-            dpg.delete_item("image")
-        dpg.add_image(texture_tag, parent="image_container", tag="image")
+    # IMAGE VIEW
+
+    def _handle_image_input(self):
+        """
+        Pans the image view while the image is dragged with the left mouse button.
+        """
+
+        if not dpg.is_mouse_button_down(dpg.mvMouseButton_Left) or not dpg.does_item_exist("image"):
+            self.image_drag_mouse_pos = None
+            return
+
+        mouse_pos = dpg.get_mouse_pos(local=False)
+        if self.image_drag_mouse_pos is None:
+            if dpg.is_item_hovered("image"):
+                self.image_drag_mouse_pos = mouse_pos  # Start panning
+            return
+
+        # Moving the mouse by one pixel moves the view by one pixel on the current level of detail
+        view = self.image_view
+        delta_x = (mouse_pos[0] - self.image_drag_mouse_pos[0]) / view.scale
+        delta_y = (mouse_pos[1] - self.image_drag_mouse_pos[1]) / view.scale
+        self.image_drag_mouse_pos = mouse_pos
+        self._set_image_view(MapView(view.center_x - delta_x, view.center_y - delta_y, view.level,
+                                     view.width, view.height))
+
+    def _zoom_image_at_mouse(self, wheel_steps: float):
+        """
+        Switches the level of detail of the image view by one level per mouse wheel step
+        while keeping the point under the mouse in place.
+        """
+
+        if not dpg.does_item_exist("image") or not dpg.is_item_hovered("image"):
+            return
+
+        view = self.image_view
+        level = min(max(view.level - round(wheel_steps), 0), TankMapRenderer.MAX_LEVEL)
+
+        # Offset of the mouse from the view center in world coordinates, before and after zooming
+        mouse_pos = dpg.get_mouse_pos(local=False)
+        image_pos = dpg.get_item_rect_min("image")
+        offset_x = mouse_pos[0] - image_pos[0] - view.width / 2
+        offset_y = mouse_pos[1] - image_pos[1] - view.height / 2
+        anchor_x = view.center_x + offset_x / view.scale
+        anchor_y = view.center_y + offset_y / view.scale
+
+        scale = 2 ** -level
+        self._set_image_view(MapView(anchor_x - offset_x / scale, anchor_y - offset_y / scale, level,
+                                     view.width, view.height))
+
+    def _fit_image_view(self):
+        self.image_fit_pending = False
+        if self.tank_planet_update is not None:
+            self._set_image_view(TankMapRenderer.fit_view(self.tank_planet_update.planet,
+                                                          self.MAP_WIDTH, self.MAP_HEIGHT))
+
+    def _set_image_view(self, view: MapView):
+        self.image_view = view
+        if self.worker is not None:
+            self.worker.set_view(view)
+
+    # CALLBACKS
+
+    def _vector_mode_callback(self, sender, app_data):
+        self.vector_mode = app_data
+        dpg.configure_item(self.drawlist.tag, show=self.vector_mode)
+        dpg.configure_item("image_container", show=not self.vector_mode)
+
+        # Display the current map with the new backend
+        if self.tank_planet_update is not None:
+            self.display_map(self.tank_planet_update)
+
+    def _fit_view_callback(self):
+        if self.vector_mode:
+            self.drawlist.fit_view()
+        else:
+            self._fit_image_view()
 
-        # Update frames
-        self.frame_tags.append(texture_tag)
-        self.cur_frame_index = (self.cur_frame_index + 1) % self.MAX_FRAMES
+    def _mouse_wheel_callback(self, sender, app_data):
+        if self.vector_mode:
+            self.drawlist.zoom_at_mouse(app_data)
+        else:
+            self._zoom_image_at_mouse(app_data)
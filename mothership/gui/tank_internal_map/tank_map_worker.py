@@ -0,0 +1,130 @@
+import threading
+import traceback
+from typing import Optional
+import numpy as np
+from mothership.gui.tank_internal_map.tank_map_renderer import TankMapRenderer, MapView
+from mothership.update_event import TankPlanetUpdate
+
+
+class TankMapWorker:
+    """
+    Renders the tank's internal map in a background thread so that large maps do not stall the GUI loop.
+
+    Updates are handed over with submit() and rendered in order of arrival, but only the latest one is kept:
+    If updates arrive faster than they can be rendered, the intermediate ones are dropped (counted and reported when
+    the map is reset).
+    Rendered images are double buffered: The worker renders into the back buffer and swaps it to the front
+    when it is done, from where the GUI thread picks it up with take_image().
+    Changing the view with set_view() renders the latest update again.
+    """
+
+    renderer: TankMapRenderer  # Only ever used by the worker thread
+    # Number of updates of the current map that were replaced by a newer update before they were displayed
+    dropped_renders: int
+
+    _condition: threading.Condition
+    _pending: Optional[TankPlanetUpdate]  # Latest update that has not been rendered yet
+    _view: MapView
+    _view_changed: bool  # Whether the view changed since the last render
+    _front_image: Optional[np.ndarray]  # Latest rendered image that has not been taken yet
+    _generation: int  # Incremented by reset(). Renders of older generations are discarded.
+    _thread: threading.Thread
+
+    def __init__(self, view: MapView):
+        self.renderer = TankMapRenderer()
+        self.dropped_renders = 0
+
+        self._condition = threading.Condition()
+        self._pending = None
+        self._view = view
+        self._view_changed = False
+        self._front_image = None
+        self._generation = 0
+
+        self._thread = threading.Thread(target=self._run, name="tank_map_renderer", daemon=True)
+        self._thread.start()
+
+    def submit(self, event: TankPlanetUpdate):
+        """
+        Schedules rendering the given update, replacing any update that has not been rendered yet.
+        """
+
+        with self._condition:
+            if self._pending is not None:
+                self.dropped_renders += 1
+            self._pending = event
+            self._condition.notify()
+
+    def set_view(self, view: MapView):
+        """
+        Changes the rendered part of the map.
+        """
+
+        with self._condition:
+            if view != self._view:
+                self._view = view
+                self._view_changed = True
+                self._condition.notify()
+
+    def take_image(self) -> Optional[np.ndarray]:
+        """
+        Returns the latest rendered image or None if no new image was rendered since the last call.
+        """
+
+        with self._condition:
+            image = self._front_image
+            self._front_image = None
+            return image
+
+    def reset(self):
+        """
+        Discards all pending updates and rendered images and starts the next tank with a fresh map.
+        """
+
+        with self._condition:
+            if self.dropped_renders > 0:
+                print(f"Tank map: Dropped {self.dropped_renders} outdated renders of the previous map", flush=True)
+            self.dropped_renders = 0
+            self._pending = None
+            self._front_image = None
+            self._generation += 1
+
+    def _run(self):
+        renderer_generation = self._generation
+        last_event: Optional[TankPlanetUpdate] = None  # Rendered again when the view changes
+        while True:
+            # WAIT FOR UPDATE OR VIEW CHANGE
+            with self._condition:
+                while self._pending is None and not self._view_changed:
+                    self._condition.wait()
+                if self._generation != renderer_generation:
+                    last_event = None
+                event = self._pending if self._pending is not None else last_event
+                view = self._view
+                self._pending = None
+                self._view_changed = False
+                generation = self._generation
+
+            if generation != renderer_generation:
+                self.renderer = TankMapRenderer()
+                renderer_generation = generation
+            if event is None:
+                continue
+            last_event = event
+
+            # RENDER (BACK BUFFER)
+            try:
+                back_image = self.renderer.render_map_image(event.planet, event.cur_node, event.target_node,
+                                                            event.target_route, event.depart_dir, view)
+            except Exception:
+                # Keep the worker alive for the next update, but do not trust the partially updated map
+                traceback.print_exc()
+                self.renderer = TankMapRenderer()
+                continue
+
+            # SWAP
+            with self._condition:
+                if generation == self._generation:
+                    if self._front_image is not None:
+                        self.dropped_renders += 1  # Rendered but never displayed
+                    self._front_image = back_image
@@ -34,6 +34,10 @@ class Communications:
 
     # Threading
     unprocessed_tank_messages = deque[dict]
+    # Internal planet messages only matter as the latest state of the tank's map, so only the newest unprocessed
+    # one is kept instead of decoding and displaying every one of them
+    unprocessed_internal_planet: Optional[dict]
+    superseded_internal_planets: int  # Number of internal planet messages replaced before they were processed
     lock: threading.Lock
 
     # Does the asynchronous tank disconnect function need to be run next iteration?
@@ -59,6 +63,8 @@ class Communications:
 
         # Threading
         self.unprocessed_tank_messages = deque()
+        self.unprocessed_internal_planet = None
+        self.superseded_internal_planets = 0
         self.lock = threading.Lock()
         self.tank_lost_event_due = False
         self.last_msg_to_tank = None
@@ -108,9 +114,18 @@ class Communications:
                 if self.unprocessed_tank_messages:
                     msg = self.unprocessed_tank_messages.pop()
                 else:
-                    return events
+                    break
+            events.extend(self.handle_tank_message(msg))
+
+        # Process only the newest internal planet message
+        with self.lock:
+            msg = self.unprocessed_internal_planet
+            self.unprocessed_internal_planet = None
+        if msg is not None:
             events.extend(self.handle_tank_message(msg))
 
+        return events
+
     # --- TANK SOCKET HANDLING ---
     def try_connect_tank(self, expected_ip: str) -> bool:
         """
@@ -160,6 +175,7 @@ class Communications:
         self.tank_socket.close()
         self.tank_socket = None
         self.tank_address = None
+        self._discard_internal_planet()
 
     def handle_tank_lost_event(self):
         """
@@ -170,6 +186,15 @@ class Communications:
         self.tank_socket = None
         self.tank_address = None
         self.tank_lost_event_due = False
+        self._discard_internal_planet()
+
+    def _discard_internal_planet(self):
+        """
+        Discards the unprocessed internal planet message of a tank that is no longer connected.
+        """
+
+        with self.lock:
+            self.unprocessed_internal_planet = None
 
     def update_tank_socket(self):
         """
@@ -203,7 +228,7 @@ class Communications:
 
                     try:
                         json_message = json.loads(message)
-                        self.unprocessed_tank_messages.append(json_message)
+                        self._store_tank_message(json_message)
                         break
                     except json.JSONDecodeError:
                         continue  # JSON not yet complete -> continue receiving data
@@ -215,6 +240,21 @@ class Communications:
         except ConnectionResetError:
             self.tank_lost_event_due = True
 
+    def _store_tank_message(self, message: dict):
+        """
+        Stores the given received message to be handled in the synchronous update function.
+        An internal planet message replaces the previous one if that has not been handled yet.
+        """
+
+        if message.get('type') != "internal_planet":
+            self.unprocessed_tank_messages.append(message)
+            return
+
+        with self.lock:
+            if self.unprocessed_internal_planet is not None:
+                self.superseded_internal_planets += 1
+            self.unprocessed_internal_planet = message
+
     def send_msg_to_tank(self, message: dict):
         """
         Sends the given message to the tank client, logs it, and saves it to the last_msg_to_tank variable.
@@ -265,7 +305,11 @@ class Communications:
         return events
 
     def handle_tank_internal_planet(self, message: dict) -> list[UpdateEvent]:
-        self.logger.log(f"Processing tank internal planet message")
+        if self.superseded_internal_planets:
+            self.logger.log(f"Processing tank internal planet message "
+                            f"({self.superseded_internal_planets} older messages superseded so far)")
+        else:
+            self.logger.log(f"Processing tank internal planet message")
         return [
             TankPlanetUpdate(planet=Planet.from_dict(message['planet']), cur_node=message['cur_node'],
                              target_node=message['target_node'],
@@ -1,8 +1,15 @@
-import json
+import functools
 import os
-import glob
+from typing import Optional, Union
 from pygame import Vector2
 from mothership.gui.planet_view.tile import DraggableTile
+from mothership.gui.planet_view.tile_images import TileImageStore, TileImages
+from mothership.io import svg_rasterizer
+from mothership.io.raster_cache import RasterCache
+from mothership.io.tile_data_cache import TileDataCache
+from mothership.io.tile_pack import PACK_FILE_NAME, TilePack
+from mothership.io.tile_source import TileDirectory
+from planets.code.parsing.tile_manifest import read_tile_ignore
 from planets.code.parsing.tile_data import Tile
 
 
@@ -13,13 +20,16 @@ class TileLoader:
     """
 
     planet_directory: str
+    scale: float
 
     svg_tiles: list[DraggableTile]
+    image_store: TileImageStore
     tile_data: list[Tile]
     base_tile: Tile
 
-    def __init__(self, planet_dir: str):
+    def __init__(self, planet_dir: str, scale: float = 0.4):
         self.planet_directory = planet_dir
+        self.scale = scale
         self.svg_tiles = list()
         self.tile_data = list()
 
@@ -27,59 +37,116 @@ class TileLoader:
         """
         Loads the tile data from the class' planet_directory. By the end of the function, the class'
         svg_tiles, tile_data and base_tile variables are set, assuming that the datafiles are formatted correctly.
+        If the planet directory contains a tile pack (see tile_pack.py), everything is loaded from the pack instead of
+        the individual data and svg files, unless any of the files changed since the pack was built.
         """
-        
-        svg_dir = os.path.join(self.planet_directory, "svg")
-        data_dir = os.path.join(self.planet_directory, "data")
 
-        tile_pattern = os.path.join(svg_dir, 'tile_[a-zA-Z].svg')
-        tile_files = glob.glob(tile_pattern)
-
-        data_pattern = os.path.join(data_dir, 'tile_[a-zA-Z].json')
-        data_files = glob.glob(data_pattern)
-
-        # Check if each tile has a corresponding data file and the other way around
-        svg_bases = {os.path.splitext(os.path.basename(f))[0] for f in tile_files}
-        data_bases = {os.path.splitext(os.path.basename(f))[0] for f in data_files}
-        if svg_bases != data_bases:
-            raise FileNotFoundError("data files and svg files do not match")
-
-        # Check if each tile has a blank version and the other way around
-        blank_pattern = os.path.join(svg_dir, 'tile_[a-zA-Z]_blank.svg')
-        blank_files = glob.glob(blank_pattern)
-        blank_bases = {os.path.splitext(os.path.basename(f))[0][0:6] for f in blank_files}
-        if svg_bases != blank_bases:
-            raise FileNotFoundError("svg tile and svg blank tile files do not match")
+        source: Union[TileDirectory, TilePack] = TileDirectory(self.planet_directory)
+        pack_path = os.path.join(self.planet_directory, PACK_FILE_NAME)
+        if os.path.isfile(pack_path):
+            pack = self.open_pack(pack_path, source)
+            if pack is not None:
+                print(f"Loading tiles from pack: {pack_path}...", flush=True)
+                source = pack
 
         # Ignoring tiles
-        tile_ignore = ""
-        ignore_path = os.path.join(self.planet_directory, "tile_ignore.txt")
-        if os.path.isfile(ignore_path):
-            with open(ignore_path, 'r') as f:
-                tile_ignore = f.read()
+        tile_ignore = read_tile_ignore(self.planet_directory)
+        for tile_id in tile_ignore.difference(source.tile_ids):
+            print(f"Ignored tile {tile_id} does not exist", flush=True)
 
         # TILES
-        for file in tile_files:
-            tile_id = os.path.splitext(os.path.basename(file))[0]
+        tile_ids = [tile_id for tile_id in source.tile_ids if tile_id not in tile_ignore]
+        self.load_svg_tiles(source, tile_ids)
 
-            if tile_id not in tile_ignore:
-                print(f"Loading svg for: {tile_id}...")
-                blank_file = os.path.join(svg_dir, tile_id + "_blank.svg")
-                self.svg_tiles.append(DraggableTile(tile_id, file, blank_file, Vector2(500, 500), scale=0.4))
+        # Parsed and validated tile data is cached per data file and only recompiled if the file changed
+        cache = TileDataCache(os.path.join(self.planet_directory, ".cache", "tile_data.json"))
 
         # BASE_TILE
         print("Loading data for: base_tile...")
-        base_tile_path = os.path.join(data_dir, "base_tile.json")
-        if not os.path.isfile(base_tile_path):
-            raise FileNotFoundError("could not find base_tile.json")
-        data = open(base_tile_path, "r").read()
-        self.base_tile = Tile.as_base_tile(json.loads(data))
+        self.base_tile = cache.load_base_tile(source.read_base_tile())
 
         # DATA
-        for file in data_files:
-            data = open(file, "r").read()
-            tile_id = os.path.splitext(os.path.basename(file))[0]
+        for tile_id in tile_ids:
+            print(f"Loading data for: {tile_id}...", flush=True)
+            self.tile_data.append(cache.load_tile(source.read(tile_id, "data"), tile_id, self.base_tile))
+
+        cache.save()
+        print(f"Tile data cache: {cache.hits} hits, {cache.misses} misses", flush=True)
+
+    def open_pack(self, pack_path: str, directory: TileDirectory) -> Optional[TilePack]:
+        """
+        Opens the tile pack at the given path if it is up to date with the given planet directory.
+
+        :return: The tile pack or None if it is outdated and the tile files need to be loaded instead.
+        """
+
+        rebuild_hint = f"rebuild it with 'python -m mothership.io.tile_pack {self.planet_directory}'"
+        try:
+            pack = TilePack(pack_path)
+        except ValueError as e:
+            print(f"Ignoring tile pack: {e}, {rebuild_hint}", flush=True)
+            return None
+
+        changed = pack.changed_sources(directory)
+        if changed:
+            listed = ", ".join(changed[:5]) + (f" and {len(changed) - 5} more" if len(changed) > 5 else "")
+            print(f"Ignoring outdated tile pack {pack_path} (changed since it was built: {listed}), {rebuild_hint}",
+                  flush=True)
+            return None
+        return pack
+
+    def load_svg_tiles(self, source: Union[TileDirectory, TilePack], tile_ids: list[str]):
+        """
+        Creates a DraggableTile for each placed instance of the given tiles. All instances of a tile design share its
+        images, so only the designs are ever rasterized. Tiles start out in detailed mode, so only the detailed
+        svgs are prepared here: Rasters from a tile pack are memory-mapped without copying, the rest are taken from
+        the on-disk raster cache if possible and all others are rasterized in parallel.
+        The blank svgs are only rasterized once they are needed (see TileImages) and svgs whose rasters are in the
+        pack are not even read until a new zoom level needs to be rasterized.
+        """
 
-            if tile_id not in tile_ignore:
-                print(f"Loading data for: {tile_id}...", flush=True)
-                self.tile_data.append(Tile.from_json_dict(json.loads(data), self.base_tile, tile_id))
+        size = int(svg_rasterizer.TILE_SVG_SIZE * self.scale)
+        raster_cache = RasterCache(os.path.join(self.planet_directory, ".cache", "rasters"))
+        raster_cache.evict()
+        self.image_store = TileImageStore(raster_cache)
+
+        all_images: list[TileImages] = list()
+        for tile_id in tile_ids:
+            images = TileImages(self.image_store, functools.partial(_read_svg, source, tile_id), size)
+            for blank in [False, True]:
+                packed_rgba = source.raster(tile_id, blank, size)
+                if packed_rgba is not None:
+                    images.set_packed_rgba(blank, packed_rgba)
+            all_images.append(images)
+
+        # DETAILED IMAGES
+        missing: list[TileImages] = list()
+        for tile_id, images in zip(tile_ids, all_images):
+            if source.raster(tile_id, False, size) is not None:
+                continue
+            rgba = raster_cache.get(images.svg_data(False), size, size)
+            if rgba is None:
+                missing.append(images)
+            else:
+                images.set_rgba(False, rgba)
+
+        print(f"Rasterizing {len(missing)} of {len(all_images)} detailed tile svgs...", flush=True)
+        jobs = [(images.svg_data(False), size, size) for images in missing]
+        for images, job, rgba in zip(missing, jobs, svg_rasterizer.rasterize_all(jobs)):
+            raster_cache.put(*job, rgba)
+            images.set_rgba(False, rgba)
+        print(f"Raster cache: {raster_cache.stats()}", flush=True)
+
+        for tile_id, images in zip(tile_ids, all_images):
+            count = source.instance_counts[tile_id]
+            if count == 1:
+                self.svg_tiles.append(DraggableTile(tile_id, images, Vector2(0, 0)))
+                continue
+
+            # INSTANCES (see DraggableTile.node_id())
+            for instance in range(1, count + 1):
+                self.svg_tiles.append(DraggableTile(f"{tile_id}#{instance}", images, Vector2(0, 0), tile_id))
+
+
+def _read_svg(source: Union[TileDirectory, TilePack], tile_id: str, blank: bool) -> bytes:
+    return source.read(tile_id, "blank_svg" if blank else "svg")
@@ -0,0 +1,97 @@
+import hashlib
+import mmap
+import os
+import time
+from typing import Optional
+
+
+class RasterCache:
+    """
+    Content-addressed on-disk cache of rasterized svgs. Each entry is a file of raw RGBA pixel data keyed by the
+    hash of the svg content and the output size, so changed svgs never hit stale entries and no invalidation is
+    necessary. Entries are memory-mapped on lookup and can be passed straight to pygame.image.frombuffer().
+    The cache is bounded by a maximum total size and a maximum entry age (see evict()).
+    """
+
+    cache_dir: str
+    max_bytes: int
+    max_age_seconds: float
+
+    hits: int
+    misses: int
+    evicted: int
+
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 * 1024, max_age_days: float = 30):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_days * 24 * 60 * 60
+
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _entry_path(self, svg_data: bytes, width: int, height: int) -> str:
+        content_hash = hashlib.blake2b(svg_data, digest_size=16).hexdigest()
+        return os.path.join(self.cache_dir, f"{content_hash}_{width}x{height}.rgba")
+
+    def get(self, svg_data: bytes, width: int, height: int) -> Optional[mmap.mmap]:
+        """
+        Returns the memory-mapped RGBA pixel data of the given svg content at the given size
+        or None if it is not cached.
+        """
+
+        path = self._entry_path(svg_data, width, height)
+        try:
+            with open(path, "rb") as f:
+                # Mapping a truncated file would break frombuffer(), treat it as a miss
+                if os.fstat(f.fileno()).st_size != width * height * 4:
+                    raise OSError(f"Corrupt raster cache entry {path}")
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            self.misses += 1
+            return None
+
+        os.utime(path)  # Entries are evicted by their last use
+        self.hits += 1
+        return data
+
+    def put(self, svg_data: bytes, width: int, height: int, rgba_data: bytes):
+        """
+        Stores the given RGBA pixel data of the given svg content at the given size.
+        """
+
+        path = self._entry_path(svg_data, width, height)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(rgba_data)
+        os.replace(temp_path, path)  # Never leave a half written entry behind
+
+    def evict(self):
+        """
+        Removes all entries that have not been used for longer than the maximum age and then removes the least
+        recently used entries until the cache fits into its maximum size.
+        """
+
+        entries: list[tuple[float, int, str]] = list()  # (last use, size, path)
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        now = time.time()
+        total_bytes = sum(entry[1] for entry in entries)
+        for last_use, size, path in sorted(entries):
+            if now - last_use <= self.max_age_seconds and total_bytes <= self.max_bytes:
+                break
+
+            try:
+                os.remove(path)
+            except OSError:
+                continue  # Still in use (e.g. mapped on windows), try again next time
+            total_bytes -= size
+            self.evicted += 1
+
+    def stats(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses, {self.evicted} evicted"
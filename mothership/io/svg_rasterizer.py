@@ -0,0 +1,51 @@
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+import cairosvg
+import pygame
+
+# Assumes that the user has created the tile svgs with the correct resolution :)
+TILE_SVG_SIZE = 1000
+
+
+def rasterize_svg(svg_data: bytes, width: int, height: int) -> bytes:
+    """
+    Rasterizes the given svg file content to the given size.
+
+    :return: The raw RGBA pixel data of the image, ready for pygame.image.frombuffer()
+    """
+
+    png_data = cairosvg.svg2png(bytestring=svg_data, output_width=width, output_height=height)
+    return pygame.image.tostring(pygame.image.load(io.BytesIO(png_data)), "RGBA")
+
+
+def _rasterize_job(job: tuple[bytes, int, int]) -> bytes:
+    return rasterize_svg(*job)
+
+
+def rasterize_all(jobs: list[tuple[bytes, int, int]], max_workers: int = None) -> list[bytes]:
+    """
+    Rasterizes all given (svg_data, width, height) jobs in parallel worker processes.
+
+    :return: The raw RGBA pixel data of each job, in the same order as the jobs
+    """
+
+    if not jobs:
+        return list()
+
+    # Spawning processes costs more than it saves for a handful of svgs
+    workers = max_workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) < 4:
+        return [rasterize_svg(*job) for job in jobs]
+
+    chunk_size = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_rasterize_job, jobs, chunksize=chunk_size))
+
+
+def surface_from_rgba(rgba_data, width: int, height: int) -> pygame.Surface:
+    """
+    Creates a surface that directly uses the given RGBA pixel buffer without copying it.
+    """
+
+    return pygame.image.frombuffer(rgba_data, (width, height), "RGBA")
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+from typing import Any
+from pygame import Vector2
+from planets.code.parsing.tile_data import Tile, TileNode, TileJoint, TilePath
+from util.direction import Direction
+
+
+class TileDataCache:
+    """
+    Cache of parsed and validated tile data files. All entries are stored in a single json file that maps
+    each tile id to the content hash of its data file and the compiled result of parsing it, i.e. the precomputed
+    node and joint coordinates as plain values from which the tile objects are rebuilt. Only tiles that passed validation are stored, so an entry with a matching hash
+    is also the cached validation result. Unchanged tiles can therefore be built without json parsing or validation.
+    """
+
+    _VERSION = 2
+    _BASE_TILE_KEY = "base_tile"
+
+    cache_path: str
+    entries: dict[str, list]  # tile id -> [content hash, compiled data]
+    base_tile_hash: str
+    is_dirty: bool
+    used_keys: set[str]  # Entries that were looked up since the cache was read. Only these are saved.
+
+    hits: int
+    misses: int
+
+    def __init__(self, cache_path: str):
+        self.cache_path = cache_path
+        self.entries = self._read_entries()
+        self.base_tile_hash = ""
+        self.is_dirty = False
+        self.used_keys = set()
+
+        self.hits = 0
+        self.misses = 0
+
+    def _read_entries(self) -> dict[str, list]:
+        """
+        Reads the cache entries from the cache file. A missing, outdated or unreadable cache file results in
+        an empty cache.
+        """
+
+        if not os.path.isfile(self.cache_path):
+            return dict()
+
+        try:
+            with open(self.cache_path, "r") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return dict()
+
+        if not isinstance(cache, dict) or cache.get("version") != self._VERSION:
+            return dict()
+        return cache["entries"]
+
+    def save(self):
+        """
+        Writes the cache to the cache file if any entries have changed since it was read.
+        Entries of tiles that were not loaded (e.g. deleted or ignored tiles) are dropped.
+        """
+
+        if len(self.used_keys) != len(self.entries):
+            self.entries = {key: entry for key, entry in self.entries.items() if key in self.used_keys}
+            self.is_dirty = True
+
+        if not self.is_dirty:
+            return
+
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        temp_path = self.cache_path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump({"version": self._VERSION, "entries": self.entries}, f, separators=(",", ":"))
+        os.replace(temp_path, self.cache_path)  # Never leave a half written cache behind
+        self.is_dirty = False
+
+    def load_base_tile(self, data: bytes) -> Tile:
+        """
+        Loads the base tile from the given data file content, using the cache if the file is unchanged.
+        Needs to be called before load_tile() because all tiles inherit (and are validated against) its joints.
+        """
+
+        self.base_tile_hash = content_hash(data)
+
+        self.used_keys.add(self._BASE_TILE_KEY)
+        entry = self.entries.get(self._BASE_TILE_KEY)
+        if entry is not None and entry[0] == self.base_tile_hash:
+            self.hits += 1
+            joints = {Direction.from_str(direction): [TileJoint.from_precomputed(*_to_vectors(joint))
+                                                      for joint in joint_list]
+                      for direction, joint_list in entry[1].items()}
+            return Tile(tile_id="base_tile", joints=joints, nodes=list(), paths=list())
+
+        self.misses += 1
+        base_tile = Tile.as_base_tile(json.loads(data))
+        compiled = {direction.abbreviation(): [_from_vectors(joint.name, joint.node_coord, joint.tile_coord)
+                                               for joint in joint_list]
+                    for direction, joint_list in base_tile.joints.items()}
+        self._store(self._BASE_TILE_KEY, self.base_tile_hash, compiled)
+        return base_tile
+
+    def load_tile(self, data: bytes, tile_id: str, base_tile: Tile) -> Tile:
+        """
+        Loads the tile with the given id from the given data file content, using the cache if neither the file nor
+        the base tile have changed. Invalid tiles are never cached and raise the same errors as Tile.from_json_dict().
+        """
+
+        tile_hash = content_hash(self.base_tile_hash.encode() + data)
+
+        self.used_keys.add(tile_id)
+        entry = self.entries.get(tile_id)
+        if entry is not None and entry[0] == tile_hash:
+            self.hits += 1
+            compiled_nodes, compiled_paths = entry[1]
+            nodes = [TileNode.from_precomputed(*_to_vectors(node)) for node in compiled_nodes]
+            paths = [TilePath(from_=from_, to_=to_) for from_, to_ in compiled_paths]
+            return Tile(tile_id=tile_id, joints=base_tile.joints, nodes=nodes, paths=paths)
+
+        self.misses += 1
+        tile = Tile.from_json_dict(json.loads(data), base_tile, tile_id)
+
+        compiled_nodes = [_from_vectors(node.name, node.node_coord, node.tile_coord) for node in tile.nodes]
+        compiled_paths = [(path.from_, path.to_) for path in tile.paths]
+        self._store(tile_id, tile_hash, (compiled_nodes, compiled_paths))
+        return tile
+
+    def _store(self, key: str, entry_hash: str, compiled: Any):
+        self.entries[key] = [entry_hash, compiled]
+        self.is_dirty = True
+
+
+def content_hash(data: bytes) -> str:
+    """
+    :return: Hash identifying the given file content.
+    """
+
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _from_vectors(name: str, node_coord: Vector2, tile_coord: Vector2) -> tuple:
+    return name, node_coord.x, node_coord.y, tile_coord.x, tile_coord.y
+
+
+def _to_vectors(compiled: tuple) -> tuple[str, Vector2, Vector2]:
+    name, node_x, node_y, tile_x, tile_y = compiled
+    return name, Vector2(node_x, node_y), Vector2(tile_x, tile_y)
@@ -0,0 +1,240 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+from typing import Optional
+from mothership.io import svg_rasterizer
+from mothership.io.tile_data_cache import content_hash
+from mothership.io.tile_source import TileDirectory
+from planets.code.parsing.tile_manifest import MANIFEST_FILE_NAME
+from planets.code.parsing.tile_data import Tile
+
+PACK_FILE_NAME = "tiles.pack"
+
+_MAGIC = b"PNVPACK\0"
+_VERSION = 4
+_HEADER = struct.Struct("<8sII")  # magic, version, index length
+_ALIGNMENT = 64  # Sections start at aligned offsets so that rasters can be used as pixel buffers directly
+
+_RASTER_SECTIONS = {False: "raster", True: "blank_raster"}
+_SOURCE_SECTIONS = ["data", "svg", "blank_svg"]  # Sections that are copies of files of the planet directory
+
+
+class TilePack:
+    """
+    Single indexed file bundling everything TileLoader needs from the tiles in a planet directory's manifest:
+    the base tile data and the data file, detailed and blank svg and detailed and blank raw RGBA rasters of each tile.
+
+    The file consists of a fixed header, a json index mapping each tile id and section name to an (offset, length)
+    pair and the aligned sections themselves. The pack is memory-mapped, so rasters are handed out as zero-copy
+    views that can be passed straight to pygame.image.frombuffer() and only the pages that are drawn are ever read.
+    The index also records the size, modification time and content hash of the files the pack was built from,
+    so that a pack that is out of date with its planet directory can be detected (see changed_sources()).
+    Offers the same interface as TileDirectory.
+    """
+
+    path: str
+    raster_size: int
+    tile_ids: list[str]
+    instance_counts: dict[str, int]  # tile id -> how many instances of the tile design are placed
+    # Path of each source file relative to the planet directory -> [size, modification time in ns, content hash]
+    sources: dict[str, list]
+
+    _mmap: mmap.mmap
+    _view: memoryview
+    _base_tile: list[int]  # [offset, length] of the base tile data
+    _sections: dict[str, dict[str, list[int]]]  # tile id -> section name -> [offset, length]
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, index_length = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{path} is not a tile pack of version {_VERSION}")
+        index = json.loads(self._mmap[_HEADER.size:_HEADER.size + index_length])
+
+        self.raster_size = index["raster_size"]
+        self._base_tile = index["base_tile"]
+        self._sections = index["sections"]
+        self.tile_ids = list(self._sections.keys())
+        self.instance_counts = {tile_id: index["instance_counts"].get(tile_id, 1) for tile_id in self.tile_ids}
+        self.sources = index["sources"]
+        self._view = memoryview(self._mmap)
+
+    def changed_sources(self, directory: TileDirectory) -> list[str]:
+        """
+        Compares the files the pack was built from with the current files of the given planet directory.
+        Only files whose size or modification time changed are read and compared by their content hash, so checking
+        an up to date pack does not read any tile files. Tiles that were added to or removed from the manifest
+        show up as a changed manifest.
+
+        :return: The paths of all files that changed or are missing since the pack was built,
+            relative to the planet directory. Empty if the pack is up to date.
+        """
+
+        paths = [MANIFEST_FILE_NAME, directory.path_of_base_tile()]
+        paths += [directory.path_of(tile_id, section) for tile_id in directory.tile_ids for section in _SOURCE_SECTIONS]
+        return [path for path in paths if not self._is_unchanged(directory.planet_directory, path)]
+
+    def _is_unchanged(self, planet_dir: str, path: str) -> bool:
+        recorded = self.sources.get(path)
+        if recorded is None:
+            return False
+        full_path = os.path.join(planet_dir, path)
+        try:
+            stat = os.stat(full_path)
+            if [stat.st_size, stat.st_mtime_ns] == recorded[:2]:
+                return True
+            return _file_hash(full_path) == recorded[2]  # Touched, but possibly with the same content
+        except OSError:
+            return False
+
+    def _section(self, tile_id: str, section: str) -> memoryview:
+        offset, length = self._sections[tile_id][section]
+        return self._view[offset:offset + length]
+
+    def read_base_tile(self) -> bytes:
+        """
+        Returns the content of the base tile data file.
+        """
+
+        offset, length = self._base_tile
+        return bytes(self._view[offset:offset + length])
+
+    def read(self, tile_id: str, section: str) -> bytes:
+        """
+        Returns a copy of the given file of the given tile.
+
+        :param section: 'data', 'svg' or 'blank_svg'
+        """
+
+        return bytes(self._section(tile_id, section))
+
+    def raster(self, tile_id: str, blank: bool, size: int) -> Optional[memoryview]:
+        """
+        Returns a zero-copy view of the raw RGBA pixel data of the given variant of the given tile
+        or None if the pack was built for a different size.
+        """
+
+        if size != self.raster_size:
+            return None
+        return self._section(tile_id, _RASTER_SECTIONS[blank])
+
+
+def write_pack(path: str, raster_size: int, base_tile_data: bytes, tiles: dict[str, dict[str, bytes]],
+               instance_counts: dict[str, int], sources: dict[str, list]):
+    """
+    Writes a tile pack to the given path.
+
+    :param tiles: tile id -> section name -> section content
+    :param instance_counts: tile id -> how many instances of the tile design are placed
+    :param sources: Path of each file the pack is built from -> [size, modification time in ns, content hash]
+    """
+
+    instance_counts = {tile_id: count for tile_id, count in instance_counts.items() if count != 1}
+
+    # The index stores absolute offsets, which depend on the length of the index itself.
+    # Reserving some room for the offsets settles this within a few iterations.
+    index_length = 0
+    while True:
+        offset = _align(_HEADER.size + index_length)
+        index = {"raster_size": raster_size, "instance_counts": instance_counts, "sources": sources,
+                 "base_tile": [offset, len(base_tile_data)], "sections": dict()}
+        offset = _align(offset + len(base_tile_data))
+        for tile_id, tile_sections in tiles.items():
+            index["sections"][tile_id] = dict()
+            for name, content in tile_sections.items():
+                index["sections"][tile_id][name] = [offset, len(content)]
+                offset = _align(offset + len(content))
+
+        index_data = json.dumps(index).encode()
+        if len(index_data) <= index_length:
+            break
+        index_length = len(index_data) + 256
+
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, len(index_data)))
+        f.write(index_data)
+        f.seek(index["base_tile"][0])
+        f.write(base_tile_data)
+        for tile_id, tile_sections in tiles.items():
+            for name, content in tile_sections.items():
+                f.seek(index["sections"][tile_id][name][0])
+                f.write(content)
+    os.replace(temp_path, path)  # Never leave a half written pack behind
+
+
+def build_pack(planet_dir: str, out_path: str, scale: float = 0.4) -> list[str]:
+    """
+    Validates all tiles of the given planet directory, rasterizes their svgs at the given scale
+    and bundles everything into a tile pack.
+
+    :return: The ids of the packed tiles
+    """
+
+    source = TileDirectory(planet_dir)
+    size = int(svg_rasterizer.TILE_SVG_SIZE * scale)
+
+    # Recorded before any content is read, so that a file changing in the meantime never looks up to date
+    paths = [MANIFEST_FILE_NAME, source.path_of_base_tile()]
+    paths += [source.path_of(tile_id, section) for tile_id in source.tile_ids for section in _SOURCE_SECTIONS]
+    sources = {path: _source_entry(planet_dir, path) for path in paths}
+
+    base_tile_data = source.read_base_tile()
+    base_tile = Tile.as_base_tile(json.loads(base_tile_data))
+
+    tiles: dict[str, dict[str, bytes]] = dict()
+    for tile_id in source.tile_ids:
+        data = source.read(tile_id, "data")
+        Tile.from_json_dict(json.loads(data), base_tile, tile_id)  # Never pack invalid tiles
+        tiles[tile_id] = {"data": data, "svg": source.read(tile_id, "svg"),
+                          "blank_svg": source.read(tile_id, "blank_svg")}
+
+    print(f"Rasterizing {2 * len(tiles)} tile svgs...", flush=True)
+    jobs = [(tile_sections[svg], size, size) for tile_sections in tiles.values() for svg in ["svg", "blank_svg"]]
+    rasters = iter(svg_rasterizer.rasterize_all(jobs))
+    for tile_sections in tiles.values():
+        tile_sections["raster"] = next(rasters)
+        tile_sections["blank_raster"] = next(rasters)
+
+    write_pack(out_path, size, base_tile_data, tiles, source.instance_counts, sources)
+    return list(tiles.keys())
+
+
+def _file_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return content_hash(f.read())
+
+
+def _source_entry(planet_dir: str, path: str) -> list:
+    """
+    :return: [size, modification time in ns, content hash] of the given file of the planet directory
+    """
+
+    full_path = os.path.join(planet_dir, path)
+    stat = os.stat(full_path)
+    return [stat.st_size, stat.st_mtime_ns, _file_hash(full_path)]
+
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bundles the tiles of a planet directory into a single tile pack.")
+    parser.add_argument("planet_dir", nargs="?", default="planets")
+    parser.add_argument("--out", help=f"Path of the pack (default: <planet_dir>/{PACK_FILE_NAME})")
+    parser.add_argument("--scale", type=float, default=0.4, help="Scale of the rasters (must match TileLoader)")
+    args = parser.parse_args()
+
+    out_path = args.out or os.path.join(args.planet_dir, PACK_FILE_NAME)
+    tile_ids = build_pack(args.planet_dir, out_path, args.scale)
+    print(f"Packed {len(tile_ids)} tiles into {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import os
+from typing import Optional
+from planets.code.parsing.tile_manifest import read_manifest
+
+
+class TileDirectory:
+    """
+    The tile files of a planet directory as listed in its manifest (see tile_manifest.py), i.e. the tile data files
+    and the detailed and blank svgs of each tile. Offers the same interface as TilePack so that TileLoader can load
+    from either.
+    """
+
+    planet_directory: str
+    tile_ids: list[str]
+    instance_counts: dict[str, int]  # tile id -> how many instances of the tile design are placed
+
+    _base_tile_path: str
+    _entries: dict[str, dict]  # tile id -> section name -> path relative to the planet directory
+
+    def __init__(self, planet_dir: str):
+        self.planet_directory = planet_dir
+        self._base_tile_path, self._entries = read_manifest(planet_dir)
+        self.tile_ids = list(self._entries.keys())
+        self.instance_counts = {tile_id: entry.get("count", 1) for tile_id, entry in self._entries.items()}
+
+    def read_base_tile(self) -> bytes:
+        """
+        Returns the content of the base tile data file.
+        """
+
+        base_tile_path = os.path.join(self.planet_directory, self._base_tile_path)
+        if not os.path.isfile(base_tile_path):
+            raise FileNotFoundError("could not find base_tile.json")
+        return _read_file(base_tile_path)
+
+    def read(self, tile_id: str, section: str) -> bytes:
+        """
+        Returns the content of the given file of the given tile.
+
+        :param section: 'data', 'svg' or 'blank_svg'
+        """
+
+        return _read_file(os.path.join(self.planet_directory, self._entries[tile_id][section]))
+
+    def path_of_base_tile(self) -> str:
+        """
+        Returns the path of the base tile data file relative to the planet directory.
+        """
+
+        return self._base_tile_path
+
+    def path_of(self, tile_id: str, section: str) -> str:
+        """
+        Returns the path of the given file of the given tile relative to the planet directory.
+
+        :param section: 'data', 'svg' or 'blank_svg'
+        """
+
+        return self._entries[tile_id][section]
+
+    def raster(self, tile_id: str, blank: bool, size: int) -> Optional[memoryview]:
+        """
+        Planet directories only contain svgs, so there are never any prerasterized images.
+        """
+
+        return None
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
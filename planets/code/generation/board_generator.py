@@ -0,0 +1,360 @@
+from __future__ import annotations
+import argparse
+import json
+import os
+import random
+from dataclasses import dataclass
+from planets.code.parsing.tile_manifest import default_entry, write_manifest
+from planets.code.parsing.tile_data import Tile, node_coord_to_tile_coord
+from util.direction import Direction
+
+
+@dataclass
+class GeneratorSettings:
+    """
+    Dataclass holding the parameters of a generated board. All chances are probabilities in the range [0, 1].
+    The same settings and seed always produce the same board.
+    """
+
+    rows: int
+    cols: int
+    seed: int = 0
+
+    node_density: float = 0.6  # Chance that each of the nine node positions of a tile holds a node
+    path_density: float = 0.8  # Chance that a straight path between two neighbouring path points is kept
+    loop_chance: float = 0.1  # Chance that a node connects two of its free exits with a loop-back path
+    dead_end_chance: float = 0.1  # Chance that a node is trimmed down to a single path
+    pass_through_chance: float = 0.5  # Chance that a straight path from joint to joint is kept
+    rotate_tiles: bool = False  # Whether the layout places the tiles with random rotations
+    designs: int = 0  # Number of distinct tile designs that are placed multiple times (0 -> a unique design per cell)
+
+
+# Node names follow the consonant-vowel pattern of the handmade tiles (e.g. 'bolvor') so that they are always six
+# characters long and can never contain the substring 'joint'.
+_CONSONANTS = "bcdfghklmnprstvwxz"
+_VOWELS = "aeiou"
+_NAME_SPACE = (len(_CONSONANTS) * len(_VOWELS)) ** 3
+
+_SVG_HEADER = """<svg width="1000" height="1000" xmlns="http://www.w3.org/2000/svg">
+
+  <defs>
+    <g id="h_joints">
+      <rect x="0" y="110" width="23" height="20" fill="black"/>
+      <rect x="0" y="490" width="23" height="20" fill="black"/>
+      <rect x="0" y="870" width="23" height="20" fill="black"/>
+    </g>
+
+    <g id="v_joints">
+      <rect x="110" y="0" width="20" height="23" fill="black"/>
+      <rect x="490" y="0" width="20" height="23" fill="black"/>
+      <rect x="870" y="0" width="20" height="23" fill="black"/>
+    </g>
+
+    <g id="base-tile">
+      <rect x="0" y="0" width="1000" height="1000" fill="white"/>
+      <use href="#h_joints" x="0" y="0"/>    <!--WEST DOCKERS-->
+      <use href="#h_joints" x="977" y="0"/>  <!--EAST DOCKERS-->
+      <use href="#v_joints" x="0" y="0"/>    <!--NORTH DOCKERS-->
+      <use href="#v_joints" x="0" y="977"/>  <!--SOUTH DOCKERS-->
+    </g>
+  </defs>
+
+  <use href="#base-tile" x="0" y="0"/>
+"""
+
+
+def tile_id_for(index: int) -> str:
+    """
+    Returns the tile id of the generated tile with the given index ('tile_a' to 'tile_z', then 'tile_aa' and so on).
+    Only lowercase letters are used so that the generated files do not collide on case-insensitive file systems.
+    """
+
+    letters = ""
+    index += 1
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('a') + remainder) + letters
+    return f"tile_{letters}"
+
+
+def node_name_for(index: int) -> str:
+    """
+    Returns the six character node name with the given index in the range [0, _NAME_SPACE).
+    """
+
+    name = ""
+    for _ in range(3):
+        index, vowel = divmod(index, len(_VOWELS))
+        index, consonant = divmod(index, len(_CONSONANTS))
+        name += _CONSONANTS[consonant] + _VOWELS[vowel]
+    return name
+
+
+def base_tile_dict() -> dict:
+    """
+    Returns the json data dict of the base tile, i.e. the three joints at each side of a tile.
+    """
+
+    joints = {
+        "NORTH": [{"name": f"joint_N{i}", "node_coord": [i, 4]} for i in range(1, 4)],
+        "EAST": [{"name": f"joint_E{i}", "node_coord": [4, i]} for i in range(1, 4)],
+        "SOUTH": [{"name": f"joint_S{i}", "node_coord": [i, 0]} for i in range(1, 4)],
+        "WEST": [{"name": f"joint_W{i}", "node_coord": [0, i]} for i in range(1, 4)]
+    }
+    return {"joints": joints, "nodes": "None", "paths": "None"}
+
+
+def generate_tile(settings: GeneratorSettings, rng: random.Random, node_names: list[str]) -> dict:
+    """
+    Generates the json data dict of a single random tile. Node names are taken from the end of the given list.
+
+    Paths only run in straight lines along the rows and columns of the node coordinate grid. Empty node positions
+    let either horizontal or vertical paths pass through them, never both, so that paths never cross.
+    """
+
+    # NODES
+    nodes: dict[tuple[int, int], str] = dict()
+    pass_orientation: dict[tuple[int, int], str] = dict()  # Empty position -> 'h' or 'v'
+    for x in range(1, 4):
+        for y in range(1, 4):
+            if rng.random() < settings.node_density:
+                nodes[(x, y)] = node_names.pop()
+            else:
+                pass_orientation[(x, y)] = rng.choice("hv")
+
+    # STRAIGHT PATHS
+    # Each line is a list of (coord, point id, exit towards the previous point, exit towards the next point)
+    lines: list[list[tuple[tuple[int, int], str, str, str]]] = list()
+    for y in range(1, 4):
+        line = [((0, y), f"joint_W{y}", "", "")]
+        line.extend(((x, y), nodes.get((x, y), "h"), "W", "E") for x in range(1, 4))
+        line.append(((4, y), f"joint_E{y}", "", ""))
+        lines.append(line)
+    for x in range(1, 4):
+        line = [((x, 0), f"joint_S{x}", "", "")]
+        line.extend(((x, y), nodes.get((x, y), "v"), "S", "N") for y in range(1, 4))
+        line.append(((x, 4), f"joint_N{x}", "", ""))
+        lines.append(line)
+
+    paths: list[tuple[str, str]] = list()
+    for line in lines:
+        previous = None
+        for coord, point_id, exit_back, exit_forward in line:
+            # Empty positions are transparent for paths of their orientation and walls for the others
+            if coord in pass_orientation:
+                if pass_orientation[coord] != point_id:
+                    previous = None
+                continue
+
+            if previous is not None:
+                from_ = previous[0] if "joint" in previous[0] else f"{previous[0]}:{previous[1]}"
+                to_ = point_id if "joint" in point_id else f"{point_id}:{exit_back}"
+                is_pass_through = "joint" in from_ and "joint" in to_
+                chance = settings.pass_through_chance if is_pass_through else settings.path_density
+                if rng.random() < chance:
+                    paths.append((from_, to_))
+            previous = (point_id, exit_forward)
+
+    # DEAD ENDS AND LOOPS
+    dead_ends: set[str] = set()
+    for name in nodes.values():
+        node_paths = [p for p in paths if p[0].startswith(f"{name}:") or p[1].startswith(f"{name}:")]
+        if len(node_paths) > 1 and rng.random() < settings.dead_end_chance:
+            keep = rng.choice(node_paths)
+            paths = [p for p in paths if p not in node_paths or p == keep]
+            dead_ends.add(name)
+
+    for name in nodes.values():
+        if name in dead_ends or rng.random() >= settings.loop_chance:
+            continue
+
+        used = {p[i] for p in paths for i in range(2)}
+        free_exits = [d for d in "NESW" if f"{name}:{d}" not in used]
+        if len(free_exits) >= 2:
+            exit_a, exit_b = rng.sample(free_exits, 2)
+        elif len(free_exits) == 1:
+            exit_a = exit_b = free_exits[0]
+        else:
+            continue
+        paths.append((f"{name}:{exit_a}", f"{name}:{exit_b}"))
+
+    # Nodes without any paths cannot be reached, so they are dropped
+    connected = {p[i].split(":")[0] for p in paths for i in range(2)}
+    return {
+        "joints": "base_tile",
+        "nodes": [{"name": name, "node_coord": [x, y]} for (x, y), name in nodes.items() if name in connected],
+        "paths": [{"from": from_, "to": to_} for from_, to_ in paths]
+    }
+
+
+def tile_svg(tile_dict: dict, blank: bool) -> str:
+    """
+    Returns the svg drawing of the given tile json data dict. The blank version leaves out the node labels.
+    """
+
+    coords: dict[str, tuple[float, float]] = dict()
+    for node in tile_dict["nodes"]:
+        coords[node["name"]] = _svg_coord(node["node_coord"])
+    for joint_list in base_tile_dict()["joints"].values():
+        for joint in joint_list:
+            coords[joint["name"]] = _svg_coord(joint["node_coord"])
+
+    svg = [_SVG_HEADER, "  <!--PATHS-->"]
+    for path in tile_dict["paths"]:
+        point_a, exit_a = _split_path_point(path["from"])
+        point_b, exit_b = _split_path_point(path["to"])
+
+        if point_a == point_b:  # Loop-back path
+            start = _exit_point(coords[point_a], exit_a, 60)
+            end = _exit_point(coords[point_b], exit_b, 60)
+            control_a = _exit_point(coords[point_a], exit_a, 160)
+            control_b = _exit_point(coords[point_b], exit_b, 160)
+            svg.append(f'  <path d="M {coords[point_a][0]} {coords[point_a][1]} L {start[0]} {start[1]} '
+                       f'C {control_a[0]} {control_a[1]}, {control_b[0]} {control_b[1]}, {end[0]} {end[1]} '
+                       f'L {coords[point_b][0]} {coords[point_b][1]}" '
+                       f'stroke="black" fill="none" stroke-width="20" stroke-linecap="square"/>')
+        else:
+            (x1, y1), (x2, y2) = coords[point_a], coords[point_b]
+            svg.append(f'  <line x1="{x1}" y1="{y1}" x2="{x2}" y2="{y2}" '
+                       f'stroke="black" stroke-width="20" stroke-linecap="square"/>')
+
+    if not blank:
+        svg.append("\n  <!--INFO-->")
+        for node in tile_dict["nodes"]:
+            x, y = coords[node["name"]]
+            svg.append(f'  <rect x="{x + 30}" y="{y + 30}" width="110" height="40" fill="#006eff"/>')
+            svg.append(f'  <text x="{x + 40}" y="{y + 58}" font-family="Verdana" font-size="25" '
+                       f'fill="#ffffff">{node["name"]}</text>')
+
+    svg.append("</svg>\n")
+    return "\n".join(svg)
+
+
+def _svg_coord(node_coord: list[int]) -> tuple[float, float]:
+    """
+    Converts the given node coordinate to svg coordinates (in mm, with the y-axis pointing down).
+    """
+
+    return node_coord_to_tile_coord[node_coord[0]], 1000 - node_coord_to_tile_coord[node_coord[1]]
+
+
+def _split_path_point(point_id: str) -> tuple[str, str]:
+    """
+    Splits the given path point into its node or joint name and the exit direction ('' for joints).
+    """
+
+    split = point_id.split(":")
+    return split[0], split[1] if len(split) == 2 else ""
+
+
+def _exit_point(coord: tuple[float, float], exit_dir: str, distance: float) -> tuple[float, float]:
+    """
+    Returns the svg point at the given distance from coord in the given exit direction.
+    """
+
+    direction = Direction.from_str(exit_dir)
+    if direction == Direction.NORTH:
+        return coord[0], coord[1] - distance
+    elif direction == Direction.EAST:
+        return coord[0] + distance, coord[1]
+    elif direction == Direction.SOUTH:
+        return coord[0], coord[1] + distance
+    return coord[0] - distance, coord[1]
+
+
+def generate_board(settings: GeneratorSettings, out_dir: str) -> list[str]:
+    """
+    Generates a board of rows x cols tiles and writes it to the given directory in the same structure as
+    the 'planets' directory (data/tile_<id>.json, data/base_tile.json, svg/tile_<id>.svg, svg/tile_<id>_blank.svg)
+    along with its manifest.json and a layout.json describing where each tile is placed.
+    Every generated tile is parsed and validated with the tile_data module before it is written.
+    If the settings limit the number of designs, the cells are filled with instances of the designs in random order
+    and the layout refers to them by their instance ids (e.g. 'tile_a#2').
+
+    :return: The ids of the generated tile designs
+    """
+
+    rng = random.Random(settings.seed)
+    cell_count = settings.rows * settings.cols
+    tile_count = settings.designs or cell_count
+    if tile_count > cell_count:
+        raise ValueError(f"Cannot place {tile_count} designs on {cell_count} cells")
+    if tile_count * 9 > _NAME_SPACE:
+        raise ValueError(f"Cannot generate unique node names for {tile_count} tiles")
+
+    data_dir = os.path.join(out_dir, "data")
+    svg_dir = os.path.join(out_dir, "svg")
+    os.makedirs(data_dir, exist_ok=True)
+    os.makedirs(svg_dir, exist_ok=True)
+
+    base_dict = base_tile_dict()
+    base_tile = Tile.as_base_tile(base_dict)
+    with open(os.path.join(data_dir, "base_tile.json"), "w") as f:
+        json.dump(base_dict, f, indent=2)
+
+    node_names = [node_name_for(i) for i in rng.sample(range(_NAME_SPACE), tile_count * 9)]
+
+    tile_ids: list[str] = list()
+    for index in range(tile_count):
+        tile_id = tile_id_for(index)
+        tile_dict = generate_tile(settings, rng, node_names)
+        Tile.from_json_dict(tile_dict, base_tile, tile_id)  # Raises if the generated tile is invalid
+
+        with open(os.path.join(data_dir, f"{tile_id}.json"), "w") as f:
+            json.dump(tile_dict, f, indent=2)
+        with open(os.path.join(svg_dir, f"{tile_id}.svg"), "w") as f:
+            f.write(tile_svg(tile_dict, blank=False))
+        with open(os.path.join(svg_dir, f"{tile_id}_blank.svg"), "w") as f:
+            f.write(tile_svg(tile_dict, blank=True))
+        tile_ids.append(tile_id)
+
+    # INSTANCES
+    cell_designs = [tile_ids[index % tile_count] for index in range(cell_count)]
+    if settings.designs:
+        rng.shuffle(cell_designs)
+    counts = {tile_id: cell_designs.count(tile_id) for tile_id in tile_ids}
+    placed: dict[str, int] = {tile_id: 0 for tile_id in tile_ids}
+
+    layout_tiles: list[dict] = list()
+    for index, design_id in enumerate(cell_designs):
+        placed[design_id] += 1
+        placement_id = design_id if counts[design_id] == 1 else f"{design_id}#{placed[design_id]}"
+        rotation = rng.choice([0, 90, 180, 270]) if settings.rotate_tiles else 0
+        layout_tiles.append({"tile_id": placement_id, "design_id": design_id,
+                             "cell": [index % settings.cols, index // settings.cols], "rotation": rotation})
+
+    # LAYOUT (cell x grows to the east, cell y grows to the south like the planet view's screen space)
+    with open(os.path.join(out_dir, "layout.json"), "w") as f:
+        json.dump({"rows": settings.rows, "cols": settings.cols, "tiles": layout_tiles}, f, indent=2)
+
+    write_manifest(out_dir, {tile_id: default_entry(tile_id, counts[tile_id]) for tile_id in tile_ids})
+
+    return tile_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generates a seeded synthetic planet board for scale testing.")
+    parser.add_argument("out_dir", help="Directory to write the board to (same structure as 'planets')")
+    parser.add_argument("--rows", type=int, default=4)
+    parser.add_argument("--cols", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--node-density", type=float, default=0.6)
+    parser.add_argument("--path-density", type=float, default=0.8)
+    parser.add_argument("--loop-chance", type=float, default=0.1)
+    parser.add_argument("--dead-end-chance", type=float, default=0.1)
+    parser.add_argument("--pass-through-chance", type=float, default=0.5)
+    parser.add_argument("--rotate-tiles", action="store_true")
+    parser.add_argument("--designs", type=int, default=0, help="Number of distinct tile designs (default: one per cell)")
+    args = parser.parse_args()
+
+    settings = GeneratorSettings(rows=args.rows, cols=args.cols, seed=args.seed,
+                                 node_density=args.node_density, path_density=args.path_density,
+                                 loop_chance=args.loop_chance, dead_end_chance=args.dead_end_chance,
+                                 pass_through_chance=args.pass_through_chance, rotate_tiles=args.rotate_tiles,
+                                 designs=args.designs)
+    tile_ids = generate_board(settings, args.out_dir)
+    print(f"Generated {len(tile_ids)} tile designs for {args.rows * args.cols} cells in {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,13 +12,15 @@ def parse_planet(draggable_tiles: list[DraggableTile], tile_data: list[Tile]) ->
     Parses the given set of draggable tiles and the corresponding tile data into a planet with a single coordinate
     system and no joints inbetween.
     Therein it also maps all local direction data to global directions.
+    Tile designs that are placed multiple times share their tile data, their nodes are namespaced per instance
+    (see DraggableTile.node_id()).
     """
 
-    # Mapping tile ids to their data and draggable representations
+    # Mapping tile (placement) ids to their data and draggable representations
+    design_dict = {t.tile_id: t for t in tile_data}
     tile_values: dict[str, tuple[DraggableTile, Tile]] = dict()
-    draggable_dict = {t.tile_id: t for t in draggable_tiles}
-    for tile in tile_data:
-        tile_values[tile.tile_id] = (draggable_dict[tile.tile_id], tile)
+    for tile in draggable_tiles:
+        tile_values[tile.tile_id] = (tile, design_dict[tile.design_id])
 
     nodes = parse_nodes(tile_values)
     paths = parse_paths(tile_values, nodes)
@@ -34,15 +36,17 @@ def parse_nodes(tile_data: dict[str, tuple[DraggableTile, Tile]]) -> dict[str, N
     nodes: dict[str, Node] = dict()
 
     # COORDINATE OFFSETS
-    tile_coord_offsets: dict[str, tuple[float, float]] = dict()
+    tile_coord_offsets: dict[str, tuple[int, int]] = dict()
 
     # Because all tiles are squares and connected -> find tile with the highest y coordinate (lowest on screen)
     # and use that tiles origin as the planet coordinate origin. All other tiles receive coordinate offsets
     # based on their connection to the lowest tile.
-    origin_tile = max(tile_data.values(), key=lambda value: value[0].rect.y)
+    # Tiles are placed on grid cells (whole world positions in tiles, y pointing down like the screen),
+    # so the view does not matter.
+    origin_cell = max((value[0].cell() for value in tile_data.values()), key=lambda cell: cell[1])
     for tile_id, tile in tile_data.items():
-        x_offset = (tile[0].rect.x - origin_tile[0].rect.x) * (1000 / tile[0].rect.width)
-        y_offset = (origin_tile[0].rect.y - tile[0].rect.y) * (1000 / tile[0].rect.height)
+        x_offset = tile[0].cell()[0] - origin_cell[0]
+        y_offset = origin_cell[1] - tile[0].cell()[1]
         tile_coord_offsets[tile_id] = node_offset(x_offset), node_offset(y_offset)
 
     # NODES
@@ -61,17 +65,18 @@ def parse_nodes(tile_data: dict[str, tuple[DraggableTile, Tile]]) -> dict[str, N
             coord.y += coord_offset[1]
 
             # Paths get added to the nodes in the parse_paths() function
-            nodes[node.name] = Node(name=node.name, coord=coord)
+            node_id = tile[0].node_id(node.name)
+            nodes[node_id] = Node(name=node_id, coord=coord)
 
     return nodes
 
 
-def node_offset(tile_offset: float) -> float:
+def node_offset(tile_offset: int) -> int:
     """
-    :return: The node coord offset based on the given tile coord offset
+    :return: The node coord offset based on the given offset in grid cells
     """
 
-    return int(tile_offset / 1000) * 3
+    return tile_offset * 3
 
 
 def rotate_coord(coord: Vector2, origin: Vector2, rotation_deg: int) -> Vector2:
@@ -135,13 +140,13 @@ def parse_paths(tile_data: dict[str, tuple[DraggableTile, Tile]], nodes: dict[st
 
 def parse_path_node(node_id: str, tile_id: str, tile_data: dict[str, tuple[DraggableTile, Tile]]) -> str:
     """
-    Takes the given node_id and parses it to a valid node.
-    If the node_id is already valid, it is simply returned. If it is a joint id, then the function will find
+    Takes the given node_id of the given tile's design and parses it to a valid planet-wide node id.
+    If the node_id is already a node, its namespaced id is returned. If it is a joint id, then the function will find
     the node that joint is connected to and return it.
     """
 
     if "joint" not in node_id:
-        return node_id
+        return tile_data[tile_id][0].node_id(node_id)
 
     # JOINT
     split = node_id.split("_")
@@ -162,18 +167,12 @@ def parse_path_node(node_id: str, tile_id: str, tile_data: dict[str, tuple[Dragg
     for path in connected_tile[1].paths:
         # CONNECTED TO 'TO'
         if path.to_ == connected_joint_id:
-            if "joint" not in path.from_:
-                node_b = path.from_
-            else:
-                node_b = parse_path_node(path.from_, connected_tile[1].tile_id, tile_data)
+            node_b = parse_path_node(path.from_, connected_tile[0].tile_id, tile_data)
             break
 
         # CONNECTED TO 'FROM'
         elif path.from_ == connected_joint_id:
-            if "joint" not in path.to_:
-                node_b = path.to_
-            else:
-                node_b = parse_path_node(path.to_, connected_tile[1].tile_id, tile_data)
+            node_b = parse_path_node(path.to_, connected_tile[0].tile_id, tile_data)
             break
 
     return node_b
@@ -181,11 +180,11 @@ def parse_path_node(node_id: str, tile_id: str, tile_data: dict[str, tuple[Dragg
 
 def get_tile_id(node_id: str, tile_data: dict[str, tuple[DraggableTile, Tile]]) -> str:
     """
-    Gets the name of the tile which the given node id belongs to.
+    Gets the id of the placed tile which the given (namespaced) node id belongs to.
     """
 
-    for tile in tile_data.values():
+    for tile_id, tile in tile_data.items():
         for node in tile[1].nodes:
-            if node_id == node.name:
-                return tile[1].tile_id
+            if node_id == tile[0].node_id(node.name):
+                return tile_id
     return "None"
@@ -41,6 +41,18 @@ class TileNode:
         self.node_coord = validate_node_coord(node_coord, name)
         self.tile_coord = convert_tile_coord(node_coord, name)
 
+    @staticmethod
+    def from_precomputed(name: str, node_coord: Vector2, tile_coord: Vector2) -> TileNode:
+        """
+        Creates a node from coordinates that have already been validated and converted (e.g. by a tile data cache).
+        """
+
+        node = TileNode.__new__(TileNode)
+        node.name = name
+        node.node_coord = node_coord
+        node.tile_coord = tile_coord
+        return node
+
 
 @dataclass
 class TileJoint:
@@ -61,6 +73,18 @@ class TileJoint:
         self.node_coord = validate_node_coord(node_coord, name)
         self.tile_coord = convert_tile_coord(node_coord, name)
 
+    @staticmethod
+    def from_precomputed(name: str, node_coord: Vector2, tile_coord: Vector2) -> TileJoint:
+        """
+        Creates a joint from coordinates that have already been validated and converted (e.g. by a tile data cache).
+        """
+
+        joint = TileJoint.__new__(TileJoint)
+        joint.name = name
+        joint.node_coord = node_coord
+        joint.tile_coord = tile_coord
+        return joint
+
     @staticmethod
     def parse_joints(data: dict) -> dict[Direction, list[TileJoint]]:
         joints_dict = {}
@@ -0,0 +1,130 @@
+import argparse
+import json
+import os
+
+MANIFEST_FILE_NAME = "manifest.json"
+TILE_IGNORE_FILE_NAME = "tile_ignore.txt"
+
+_VERSION = 1
+_SECTIONS = ["data", "svg", "blank_svg"]
+
+
+def default_entry(tile_id: str, count: int = 1) -> dict:
+    """
+    Returns the manifest entry of a tile whose files follow the naming scheme of the planet directory
+    (data/<id>.json, svg/<id>.svg and svg/<id>_blank.svg).
+
+    :param count: How many instances of the tile design are placed on the board
+    """
+
+    entry = {"data": f"data/{tile_id}.json", "svg": f"svg/{tile_id}.svg", "blank_svg": f"svg/{tile_id}_blank.svg"}
+    if count != 1:
+        entry["count"] = count
+    return entry
+
+
+def read_manifest(planet_dir: str) -> tuple[str, dict[str, dict]]:
+    """
+    Reads the tile catalog of the given planet directory.
+
+    :return: The path of the base tile data file and a dict mapping each tile id to the paths of its data file,
+        svg and blank svg and its optional instance count (in manifest order).
+        All paths are relative to the planet directory.
+    """
+
+    manifest_path = os.path.join(planet_dir, MANIFEST_FILE_NAME)
+    if not os.path.isfile(manifest_path):
+        raise FileNotFoundError(f"could not find {manifest_path} "
+                                f"(create it with 'python -m planets.code.parsing.tile_manifest {planet_dir}')")
+
+    with open(manifest_path, "r") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != _VERSION:
+        raise ValueError(f"{manifest_path} is not a tile manifest of version {_VERSION}")
+
+    tiles = manifest["tiles"]
+    for tile_id, entry in tiles.items():
+        if set(entry.keys()).difference(["count"]) != set(_SECTIONS):
+            raise ValueError(f"manifest entry of {tile_id} needs the keys {_SECTIONS} and optionally 'count'")
+        if entry.get("count", 1) < 1:
+            raise ValueError(f"manifest entry of {tile_id} needs a count of at least 1")
+        if "#" in tile_id:
+            raise ValueError(f"invalid tile id {tile_id} ('#' is reserved for the ids of instances)")
+    return manifest["base_tile"], tiles
+
+
+def write_manifest(planet_dir: str, tiles: dict[str, dict], base_tile: str = "data/base_tile.json"):
+    """
+    Writes the tile catalog of the given planet directory.
+
+    :param tiles: tile id -> manifest entry (see default_entry())
+    """
+
+    manifest = {"version": _VERSION, "base_tile": base_tile, "tiles": tiles}
+    manifest_path = os.path.join(planet_dir, MANIFEST_FILE_NAME)
+    temp_path = manifest_path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(temp_path, manifest_path)  # Never leave a half written manifest behind
+
+
+def scan_planet_dir(planet_dir: str) -> dict[str, dict]:
+    """
+    Finds all tiles of the given planet directory by their data files. Every data file in data/ (other than the
+    base tile) is a tile whose id is the file name, and it needs a detailed and a blank svg in svg/.
+
+    :return: tile id -> manifest entry, sorted by tile id
+    """
+
+    data_ids = {os.path.splitext(entry.name)[0] for entry in os.scandir(os.path.join(planet_dir, "data"))
+                if entry.name.endswith(".json") and entry.name != "base_tile.json"}
+    svg_names = {entry.name for entry in os.scandir(os.path.join(planet_dir, "svg")) if entry.name.endswith(".svg")}
+
+    # Check if each tile has a corresponding svg and blank svg and the other way around
+    svg_ids = {os.path.splitext(name)[0] for name in svg_names
+               if not name.endswith("_blank.svg") and name != "base_tile.svg"}
+    if data_ids != svg_ids:
+        raise FileNotFoundError("data files and svg files do not match")
+
+    blank_ids = {name[:-len("_blank.svg")] for name in svg_names if name.endswith("_blank.svg")}
+    if svg_ids != blank_ids:
+        raise FileNotFoundError("svg tile and svg blank tile files do not match")
+
+    return {tile_id: default_entry(tile_id) for tile_id in sorted(data_ids)}
+
+
+def read_tile_ignore(planet_dir: str) -> set[str]:
+    """
+    Reads the ids of the tiles that should not be loaded from the tile ignore file of the given planet directory.
+    The file lists one exact tile id per line. Empty lines and lines starting with '#' are skipped.
+    """
+
+    ignore_path = os.path.join(planet_dir, TILE_IGNORE_FILE_NAME)
+    if not os.path.isfile(ignore_path):
+        return set()
+
+    with open(ignore_path, "r") as f:
+        lines = (line.strip() for line in f)
+        return {line for line in lines if line and not line.startswith("#")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Creates the tile manifest of a planet directory "
+                                                 "from the tile files it contains.")
+    parser.add_argument("planet_dir", nargs="?", default="planets")
+    args = parser.parse_args()
+
+    tiles = scan_planet_dir(args.planet_dir)
+
+    # Keep the instance counts of an existing manifest
+    if os.path.isfile(os.path.join(args.planet_dir, MANIFEST_FILE_NAME)):
+        _, old_tiles = read_manifest(args.planet_dir)
+        for tile_id, entry in tiles.items():
+            tiles[tile_id] = default_entry(tile_id, old_tiles.get(tile_id, entry).get("count", 1))
+
+    write_manifest(args.planet_dir, tiles)
+    print(f"Wrote {len(tiles)} tiles to {os.path.join(args.planet_dir, MANIFEST_FILE_NAME)}")
+
+
+if __name__ == "__main__":
+    main()